@@ -7,7 +7,7 @@ import PyPDF2
 import io
 from google.cloud import storage, documentai
 from google.api_core.client_options import ClientOptions
-from typing import Dict, Any, Optional, List, Union, Union
+from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
 from PIL import Image
 from pdf2image import convert_from_path
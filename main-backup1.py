@@ -1,18 +1,43 @@
+from __future__ import annotations
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import os
 import shutil
-import PyPDF2
+import tempfile
+import pikepdf
 import io
 import re
+import sys
+import time
+import logging
+from types import MappingProxyType
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from google.cloud import storage, documentai
+from google.cloud.storage import transfer_manager
 from google.api_core.client_options import ClientOptions
-from typing import Dict, Any, Optional, List, Union, Union
+from typing import TYPE_CHECKING
 from datetime import datetime
 from PIL import Image
 from pdf2image import convert_from_path
 
+if TYPE_CHECKING:
+    from typing import Dict, Any, Iterator, Optional, List, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+# Configure logging once at import
+logging.basicConfig(level=logging.INFO, 
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 # Predefined Configuration
 PROJECT_CONFIG = {
     "project_id": "neon-camp-449123-j1",
@@ -22,97 +47,191 @@ PROJECT_CONFIG = {
     "output_bucket": "doc-ai-extraction"
 }
 
+# Upload chunk size for GCS blobs (must be a multiple of 256 KiB)
+GCS_UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Payloads up to this size go up in a single multipart request
+GCS_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+def _upload_chunk_size(size: int) -> Optional[int]:
+    """Chunk size for an upload of the given size: none (single request) for small payloads"""
+    return GCS_UPLOAD_CHUNK_SIZE if size > GCS_MULTIPART_THRESHOLD else None
+
+# Column layout of the per-section Excel sheets
+SECTION_SHEET_COLUMNS = ("Page", "Level", "Type", "Value", "Raw Value", "Confidence")
+PERSON_SHEET_COLUMNS = ("Page", "Level", "Type", "Value", "Decoded Value", "Raw Value", "Confidence")
+
+# Sheet row levels written with the header format
+HEADER_LEVELS = frozenset({"Section Header", "Parent", "Person Header"})
+
+# Columns of the per-entity tables shown in the results view
+RESULT_TABLE_COLUMNS = ("Child Type", "Level", "Type", "Value", "Confidence")
+
+# Documents with more pages than this render one selected page at a time
+RESULTS_PAGE_PICKER_THRESHOLD = 10
+
+# Container types walked by CheckboxProcessor.process_nested_json
+_JSON_CONTAINER_TYPES = frozenset({dict, list})
+
+# HTML-like tags (including <cr>) stripped from narratives
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _confidence_value(confidence) -> float:
+    """Confidence score as a float for Excel rows (rendered with a percent number format)"""
+    return float(confidence or 0)
+
+# Vectorized str length, used to size Excel columns
+_str_len = np.vectorize(len, otypes=[np.int64])
+
+def _lowercase_field_hierarchy(fields):
+    """Return a copy of a field hierarchy with every key and list entry as a lowercase string"""
+    if isinstance(fields, list):
+        return [str(f).lower() for f in fields]
+    if isinstance(fields, dict):
+        return {str(field).lower(): _lowercase_field_hierarchy(subfields) for field, subfields in fields.items()}
+    return fields
+
+@lru_cache(maxsize=64)
+def _resolve_blob_path(bucket_name: str, filename: str, prefix: str = '') -> Tuple[str, str]:
+    """
+    Split a bucket name that may carry gs:// and nested folders into the bare
+    bucket name and the full blob path of a file
+    
+    Args:
+        bucket_name (str): Name of the GCS bucket, optionally with gs:// and a folder path
+        filename (str): Name of the file in the bucket
+        prefix (str, optional): Prefix/folder path in the bucket
+    
+    Returns:
+        Tuple[str, str]: Bucket name and blob path
+    """
+    # Remove 'gs://' if present and split bucket path to handle nested paths
+    bucket_parts = bucket_name.replace('gs://', '').split('/')
+    
+    # Add any additional path components to the prefix
+    additional_path = '/'.join(bucket_parts[1:]).strip('/')
+    if additional_path:
+        prefix = f"{additional_path}/{prefix}" if prefix else additional_path
+    
+    # Construct full blob path with prefix, removing any double slashes
+    full_blob_path = f"{prefix}/{filename}" if prefix else filename
+    return bucket_parts[0], full_blob_path.replace('//', '/')
+
 class DocumentPageSplitter:
-    def __init__(self, input_file_path: str, output_dir: str = 'page_splits'):
+    def __init__(self, input_file_path: str):
         """
         Initialize page splitter for a given document
         
         Args:
             input_file_path (str): Path to the input document
-            output_dir (str, optional): Directory to save split pages. Defaults to 'page_splits'.
         """
         self.input_file_path = input_file_path
         self.file_extension = os.path.splitext(input_file_path)[1].lower()
-        
-        # Ensure output directory exists
-        self.output_dir = output_dir
-        os.makedirs(self.output_dir, exist_ok=True)
+        self._source_pdf = None
     
-    def split_pdf_pages(self) -> List[str]:
+    def _get_pdf(self) -> pikepdf.Pdf:
         """
-        Split PDF into individual page files
+        Open the PDF once and reuse it for counting and splitting
         
         Returns:
-            List[str]: Paths to split page files
+            pikepdf.Pdf: The open input document
         
         Raises:
             ValueError: If input file is not a PDF
             FileNotFoundError: If input file does not exist
         """
-        # Validate input file
-        if not os.path.exists(self.input_file_path):
-            raise FileNotFoundError(f"Input file not found: {self.input_file_path}")
+        if self._source_pdf is None:
+            # Validate input file
+            if not os.path.exists(self.input_file_path):
+                raise FileNotFoundError(f"Input file not found: {self.input_file_path}")
+            
+            if self.file_extension != '.pdf':
+                raise ValueError(f"Unsupported file type. Expected PDF, got {self.file_extension}")
+            
+            self._source_pdf = pikepdf.open(self.input_file_path)
+        
+        return self._source_pdf
+    
+    def close(self):
+        """
+        Close the input document if it was opened
+        """
+        if self._source_pdf is not None:
+            self._source_pdf.close()
+            self._source_pdf = None
+    
+    def page_count(self) -> int:
+        """
+        Count the pages of the PDF without extracting them
         
-        if self.file_extension != '.pdf':
-            raise ValueError(f"Unsupported file type. Expected PDF, got {self.file_extension}")
+        Returns:
+            int: Number of pages in the document
+        """
+        return len(self._get_pdf().pages)
+    
+    def iter_page_bytes(self) -> Iterator[bytes]:
+        """
+        Split PDF into individual in-memory pages, one page at a time
         
-        page_files = []
+        Yields:
+            bytes: Single-page PDF content of each page, in page order
         
-        # Open the PDF file
+        Raises:
+            ValueError: If input file is not a PDF or has no pages
+            FileNotFoundError: If input file does not exist
+        """
         try:
-            with open(self.input_file_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
+            pages = self._get_pdf().pages
+            
+            # Verify there is something to extract
+            if not len(pages):
+                raise ValueError("No pages were extracted from the PDF")
+            
+            # Copy each page into its own PDF; qpdf shares the source's parsed
+            # objects instead of re-walking them for every page
+            for page in pages:
+                page_pdf = pikepdf.Pdf.new()
+                page_pdf.pages.append(page)
                 
-                # Iterate through each page
-                for page_num in range(len(pdf_reader.pages)):
-                    # Create a new PDF writer for this page
-                    pdf_writer = PyPDF2.PdfWriter()
-                    pdf_writer.add_page(pdf_reader.pages[page_num])
-                    
-                    # Generate output path for this page
-                    output_path = os.path.join(
-                        self.output_dir, 
-                        f'page_{page_num + 1}.pdf'
-                    )
-                    
-                    # Write the page to a new PDF file
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                    
-                    page_files.append(output_path)
+                # Render the page in memory so its bytes go straight to the processor
+                page_buffer = io.BytesIO()
+                page_pdf.save(page_buffer, linearize=False)
+                yield page_buffer.getvalue()
         
         except Exception as e:
             # Log the specific error
             print(f"Error splitting PDF: {e}")
-            # Clean up any partially created files
-            for file in page_files:
-                try:
-                    os.remove(file)
-                except:
-                    pass
             raise
+    
+    def split_pdf_pages(self) -> List[bytes]:
+        """
+        Split PDF into individual in-memory pages
         
-        # Verify files were created
-        if not page_files:
-            raise ValueError("No pages were extracted from the PDF")
+        Returns:
+            List[bytes]: Single-page PDF content of each page, in page order
         
-        return page_files
-
-    def cleanup(self):
-        """
-        Remove the temporary page split directory
+        Raises:
+            ValueError: If input file is not a PDF or has no pages
+            FileNotFoundError: If input file does not exist
         """
-        try:
-            if os.path.exists(self.output_dir):
-                shutil.rmtree(self.output_dir)
-        except Exception as e:
-            print(f"Error cleaning up page splits: {e}")
+        return list(self.iter_page_bytes())
 
 class DocumentAIProcessor:
-    def __init__(self, project_id: str, location: str):
-        """Initialize Document AI and Google Cloud Storage clients"""
+    def __init__(self, project_id: str, location: str, max_concurrency: int = 32):
+        """
+        Initialize Document AI and Google Cloud Storage clients
+        
+        Args:
+            project_id (str): Google Cloud project ID
+            location (str): Document AI processor location
+            max_concurrency (int, optional): Maximum number of pages processed in parallel;
+                page requests are I/O-bound, so this can exceed the CPU count up to the
+                Document AI quota
+        """
         self.project_id = project_id
         self.location = location
+        self.max_concurrency = max_concurrency
         
         # Document AI client
         opts = ClientOptions(api_endpoint=f"{location}-documentai.googleapis.com")
@@ -127,23 +246,40 @@ class DocumentAIProcessor:
             'factors_conditions', 'identification_location', 'investigator',
             'narrative', 'vehicle_driver_persons'
         ]
+        
+        # Excel row emitters for sections with a dedicated layout; other sections
+        # use _emit_parent_child_rows
+        self.section_row_emitters = {
+            'identification_location': self._emit_field_rows,
+            'vehicle_driver_persons': self._emit_vehicle_person_rows
+        }
+        
+        # Bucket handles by name, created on first use
+        self._bucket_cache: Dict[str, storage.Bucket] = {}
+        
+        # Processor resource names by processor ID, built on first use
+        self._processor_names: Dict[str, str] = {}
 
     def process_page(
         self, 
         processor_id: str, 
-        file_path: str, 
-        page_number: int
+        pdf_content: Optional[bytes], 
+        page_number: int,
+        file_path: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Process a single page document
+        Process a single page document from its in-memory content, or from
+        file_path for callers that still pass a page file
         """
         # Construct processor name
-        name = self.documentai_client.processor_path(self.project_id, self.location, processor_id)
+        name = self._get_processor_name(processor_id)
         
-        # Read file
-        with open(file_path, "rb") as pdf_file:
-            pdf_content = pdf_file.read()
-            print(f"Page {page_number} content size: {len(pdf_content)} bytes")
+        if pdf_content is None:
+            if file_path is None:
+                raise ValueError("Either pdf_content or file_path must be provided")
+            with open(file_path, "rb") as pdf_file:
+                pdf_content = pdf_file.read()
+        print(f"Page {page_number} content size: {len(pdf_content)} bytes")
         
         # Prepare raw document
         raw_document = documentai.RawDocument(
@@ -167,7 +303,6 @@ class DocumentAIProcessor:
             # Convert to dictionary with debug information
             processed_page = self._document_to_dict(document, page_number)
             processed_page['page_number'] = page_number
-            processed_page['original_file_path'] = file_path
             
             return processed_page
             
@@ -175,6 +310,41 @@ class DocumentAIProcessor:
             print(f"Error processing page {page_number}: {str(e)}")
             raise
 
+    def _get_processor_name(self, processor_id: str) -> str:
+        """
+        Return the cached full resource name of a Document AI processor
+        
+        Args:
+            processor_id (str): Document AI processor ID
+        
+        Returns:
+            str: Processor resource name
+        """
+        name = self._processor_names.get(processor_id)
+        if name is None:
+            name = self._processor_names[processor_id] = self.documentai_client.processor_path(
+                self.project_id, self.location, processor_id
+            )
+        return name
+
+    def _get_bucket(self, bucket_name: str) -> storage.Bucket:
+        """
+        Return a cached bucket handle
+        
+        No existence check is made; a missing or inaccessible bucket surfaces
+        as a 404/403 on the first upload.
+        
+        Args:
+            bucket_name (str): Name of the GCS bucket
+        
+        Returns:
+            storage.Bucket: Bucket handle
+        """
+        bucket = self._bucket_cache.get(bucket_name)
+        if bucket is None:
+            bucket = self._bucket_cache[bucket_name] = self.storage_client.bucket(bucket_name)
+        return bucket
+
     def upload_to_gcs(self, bucket_name: str, source_file_path: str, destination_blob_name: str, prefix: str = '') -> str:
         """
         Upload a file to Google Cloud Storage
@@ -189,30 +359,14 @@ class DocumentAIProcessor:
             str: GCS URI of the uploaded file
         """
         try:
-            # Remove 'gs://' if present and split bucket path
-            bucket_name = bucket_name.replace('gs://', '')
-            # Split bucket path to handle nested paths
-            bucket_parts = bucket_name.split('/')
-            base_bucket = bucket_parts[0]
-            
-            # Add any additional path components to the prefix
-            if len(bucket_parts) > 1:
-                additional_path = '/'.join(bucket_parts[1:])
-                prefix = f"{additional_path}/{prefix}" if prefix else additional_path
+            base_bucket, full_blob_path = _resolve_blob_path(bucket_name, destination_blob_name, prefix)
             
-            # Verify bucket exists and is accessible
-            bucket = self.storage_client.bucket(base_bucket)
-            
-            if not bucket.exists():
-                raise ValueError(f"Bucket {base_bucket} does not exist or is not accessible")
-            
-            # Construct full blob path with prefix
-            full_blob_path = f"{prefix}/{destination_blob_name}" if prefix else destination_blob_name
-            full_blob_path = full_blob_path.replace('//', '/')  # Remove any double slashes
+            # Get the cached bucket handle
+            bucket = self._get_bucket(base_bucket)
             
             # Upload the file
             blob = bucket.blob(full_blob_path)
-            blob.upload_from_filename(source_file_path)
+            blob.upload_from_filename(source_file_path, if_generation_match=0)
             
             return f"gs://{base_bucket}/{full_blob_path}"
         
@@ -322,17 +476,8 @@ class DocumentAIProcessor:
     def save_json_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> str:
         """Save JSON data to Google Cloud Storage with section-based organization"""
         try:
-            bucket_name = bucket_name.replace('gs://', '')
-            bucket_parts = bucket_name.split('/')
-            base_bucket = bucket_parts[0]
-            
-            if len(bucket_parts) > 1:
-                additional_path = '/'.join(bucket_parts[1:])
-                prefix = f"{additional_path}/{prefix}" if prefix else additional_path
-            
-            bucket = self.storage_client.bucket(base_bucket)
-            full_blob_path = f"{prefix}/{filename}" if prefix else filename
-            full_blob_path = full_blob_path.replace('//', '/')
+            base_bucket, full_blob_path = _resolve_blob_path(bucket_name, filename, prefix)
+            bucket = self._get_bucket(base_bucket)
             
             # Organize data by sections
             organized_data = {
@@ -342,8 +487,9 @@ class DocumentAIProcessor:
             
             blob = bucket.blob(full_blob_path)
             blob.upload_from_string(
-                json.dumps(organized_data, indent=2),
-                content_type='application/json'
+                self._build_json_payload(organized_data),
+                content_type='application/json',
+                if_generation_match=0
             )
             return f"gs://{base_bucket}/{full_blob_path}"
             
@@ -351,7 +497,7 @@ class DocumentAIProcessor:
             st.error(f"JSON Save Error: {str(e)}")
             raise
     
-    def _process_person_details_for_excel(self, page_num, person_entries) -> List[Dict]:
+    def _process_person_details_for_excel(self, page_num, person_entries) -> List[Tuple]:
         """
         Process person details for Excel output with expanded fields and decoded values
         
@@ -360,7 +506,7 @@ class DocumentAIProcessor:
             person_entries (List[Dict]): List of person entries
         
         Returns:
-            List of processed rows for Excel output
+            List of processed row tuples (PERSON_SHEET_COLUMNS order) for Excel output
         """
         rows = []
         
@@ -405,25 +551,25 @@ class DocumentAIProcessor:
             for key, value in basic_info.items():
                 # Special handling for type to show both original and decoded
                 if key == 'type' and isinstance(value, dict):
-                    basic_rows.append({
-                        "Page": page_num,
-                        "Level": "Person",
-                        "Type": "Person Type",
-                        "Value": value['original'],
-                        "Decoded Value": value['decoded'],
-                        "Raw Value": "",
-                        "Confidence": f"{entity.get('confidence', 0):.2%}"
-                    })
+                    basic_rows.append((
+                        page_num,
+                        "Person",
+                        "Person Type",
+                        value['original'],
+                        value['decoded'],
+                        "",
+                        _confidence_value(entity.get('confidence', 0))
+                    ))
                 else:
-                    basic_rows.append({
-                        "Page": page_num,
-                        "Level": "Person",
-                        "Type": key.replace('_', ' ').title(),
-                        "Value": value,
-                        "Decoded Value": "",
-                        "Raw Value": "",
-                        "Confidence": f"{entity.get('confidence', 0):.2%}"
-                    })
+                    basic_rows.append((
+                        page_num,
+                        "Person",
+                        key.replace('_', ' ').title(),
+                        value,
+                        "",
+                        "",
+                        _confidence_value(entity.get('confidence', 0))
+                    ))
             rows.extend(basic_rows)
             
             # Process detailed description if available
@@ -458,258 +604,273 @@ class DocumentAIProcessor:
                         code_dict = getattr(processor.data_dict, decode_method)
                         decoded_value = code_dict.get(str(value), value)
                     
-                    description_rows.append({
-                        "Page": page_num,
-                        "Level": "Person Description",
-                        "Type": display_name,
-                        "Value": value,
-                        "Decoded Value": decoded_value,
-                        "Raw Value": "",
-                        "Confidence": ""
-                    })
+                    description_rows.append((
+                        page_num,
+                        "Person Description",
+                        display_name,
+                        value,
+                        decoded_value,
+                        "",
+                        ""
+                    ))
                 
                 rows.extend(description_rows)
             
             # Add a separator row
-            rows.append({
-                "Page": page_num,
-                "Level": "Separator",
-                "Type": "",
-                "Value": "",
-                "Decoded Value": "",
-                "Raw Value": "",
-                "Confidence": ""
-            })
+            rows.append((page_num, "Separator", "", "", "", "", ""))
         
         return rows
 
-    def save_excel_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> str:
-        """Save crash report data to Excel with enhanced processing"""
-        try:
-            # Initialize processors
-            processor = CrashReportDataProcessor()
-            checkbox_processor = CheckboxProcessor()
-            section_unique_trackers = {}
+    def _emit_field_rows(self, section_type: str, section_data: List[Dict], page_num: int) -> Iterator[Tuple]:
+        """Yield one "Field" row per child field entry (identification/location layout)"""
+        process_field = CheckboxProcessor.process_json_field
+        
+        for location in section_data:
+            for field_type, field_entries in location.get("child_fields", {}).items():
+                for entry in field_entries:
+                    # Process checkbox values
+                    processed_value = process_field(entry)
+                    yield (
+                        page_num,
+                        "Field",
+                        field_type,
+                        processed_value.get('value', ''),
+                        processed_value.get('raw_value', ''),
+                        _confidence_value(processed_value.get('confidence', 0))
+                    )
+
+    def _emit_vehicle_person_rows(self, section_type: str, section_data: List[Dict], page_num: int) -> Iterator[Tuple]:
+        """Yield parent, person header, person entity and child rows for vehicle/driver/person sections"""
+        process_field = CheckboxProcessor.process_json_field
+        
+        for parent_entity in section_data:
+            # Add parent information
+            parent_proc = process_field(parent_entity)
+            yield (
+                page_num,
+                "Parent",
+                parent_proc.get('type', ''),
+                parent_proc.get('value', ''),
+                parent_proc.get('raw_value', ''),
+                _confidence_value(parent_proc.get('confidence', 0))
+            )
             
-            # Create Excel writer with xlsxwriter engine
-            with pd.ExcelWriter('temp_output.xlsx', engine='xlsxwriter') as writer:
-                workbook = writer.book
-                
-                # Process each page
-                for page in data.get("pages", []):
-                    page_num = page["page_number"]
-                    hierarchical_fields = page.get("hierarchical_fields", {})
-                    
-                    # Process sections in a specific order
-                    section_order = [
-                        'identification_location', 
-                        'vehicle_driver_persons', 
-                        'factors_conditions', 
-                        'charges', 
-                        'damage', 
-                        'disposition_of_injured_killed', 
-                        'investigator', 
-                        'narrative'
-                    ]
-                    
-                    for section_type in section_order:
-                        section_data = hierarchical_fields.get(section_type, [])
-                        
-                        if not section_data:
-                            continue
-                        
-                        # Increment section tracker
-                        if section_type not in section_unique_trackers:
-                            section_unique_trackers[section_type] = 0
-                        section_unique_trackers[section_type] += 1
-                        
-                        # Generate sheet name
-                        sheet_name = f"P{page_num}_{section_type}_{section_unique_trackers[section_type]}"[:31]
-                        rows = []
-                        
-                        # Specific processing for each section type
-                        if section_type == 'identification_location':
-                            for location in section_data:
-                                # Process each child field
-                                for field_type, field_entries in location.get("child_fields", {}).items():
-                                    for entry in field_entries:
-                                        # Process checkbox values
-                                        processed_value = checkbox_processor.process_json_field(entry)
-                                        
-                                        rows.append({
-                                            "Page": page_num,
-                                            "Level": "Field",
-                                            "Type": field_type,
-                                            "Value": processed_value.get('value', ''),
-                                            "Raw Value": processed_value.get('raw_value', ''),
-                                            "Confidence": f"{processed_value.get('confidence', 0):.2%}"
-                                        })
-                        
-                        elif section_type == 'vehicle_driver_persons':
-                            # Process person details
-                            for parent_idx, parent_entity in enumerate(section_data, 1):
-                                # Add parent information
-                                parent_proc = checkbox_processor.process_json_field(parent_entity)
-                                rows.append({
-                                    "Page": page_num,
-                                    "Level": "Parent",
-                                    "Type": parent_proc.get('type', ''),
-                                    "Value": parent_proc.get('value', ''),
-                                    "Raw Value": parent_proc.get('raw_value', ''),
-                                    "Confidence": f"{parent_proc.get('confidence', 0):.2%}"
-                                })
-                                
-                                # Process child fields
-                                for child_type, child_entries in parent_entity.get("child_fields", {}).items():
-                                    if child_type == 'person_num':
-                                        for person_idx, child_entry in enumerate(child_entries, 1):
-                                            # Add person header
-                                            rows.append({
-                                                "Page": page_num,
-                                                "Level": "Person Header",
-                                                "Type": f"Person {person_idx}",
-                                                "Value": f"Person {person_idx} Details",
-                                                "Raw Value": "",
-                                                "Confidence": ""
-                                            })
-                                            
-                                            # Process person entities
-                                            for entity in child_entry.get("entities", []):
-                                                proc_entity = checkbox_processor.process_json_field(entity)
-                                                rows.append({
-                                                    "Page": page_num,
-                                                    "Level": "Entity",
-                                                    "Type": proc_entity.get('type', ''),
-                                                    "Value": proc_entity.get('value', ''),
-                                                    "Raw Value": proc_entity.get('raw_value', ''),
-                                                    "Confidence": f"{proc_entity.get('confidence', 0):.2%}"
-                                                })
-                                    
-                                    else:
-                                        for child_entry in child_entries:
-                                            proc_child = checkbox_processor.process_json_field(child_entry)
-                                            rows.append({
-                                                "Page": page_num,
-                                                "Level": "Child",
-                                                "Type": child_type,
-                                                "Value": proc_child.get('value', ''),
-                                                "Raw Value": proc_child.get('raw_value', ''),
-                                                "Confidence": f"{proc_child.get('confidence', 0):.2%}"
-                                            })
+            # Process child fields
+            for child_type, child_entries in parent_entity.get("child_fields", {}).items():
+                if child_type == 'person_num':
+                    for person_idx, child_entry in enumerate(child_entries, 1):
+                        # Add person header
+                        yield (page_num, "Person Header", f"Person {person_idx}", f"Person {person_idx} Details", "", "")
                         
-                        elif section_type == 'factors_conditions':
-                            for entity in section_data:
-                                # Add overall section entity
-                                parent_proc = checkbox_processor.process_json_field(entity)
-                                rows.append({
-                                    "Page": page_num,
-                                    "Level": "Parent",
-                                    "Type": section_type,
-                                    "Value": parent_proc.get('value', ''),
-                                    "Raw Value": parent_proc.get('raw_value', ''),
-                                    "Confidence": f"{parent_proc.get('confidence', 0):.2%}"
-                                })
-                                
-                                # Process child fields
-                                for child_type, child_entries in entity.get("child_fields", {}).items():
-                                    for child_entry in child_entries:
-                                        proc_child = checkbox_processor.process_json_field(child_entry)
-                                        rows.append({
-                                            "Page": page_num,
-                                            "Level": "Child",
-                                            "Type": child_type,
-                                            "Value": proc_child.get('value', ''),
-                                            "Raw Value": proc_child.get('raw_value', ''),
-                                            "Confidence": f"{proc_child.get('confidence', 0):.2%}"
-                                        })
-                        
-                        # Generic processing for other sections
-                        else:
-                            for entity in section_data:
-                                # Process entity
-                                proc_entity = checkbox_processor.process_json_field(entity)
-                                rows.append({
-                                    "Page": page_num,
-                                    "Level": "Parent",
-                                    "Type": section_type,
-                                    "Value": proc_entity.get('value', ''),
-                                    "Raw Value": proc_entity.get('raw_value', ''),
-                                    "Confidence": f"{proc_entity.get('confidence', 0):.2%}"
-                                })
-                                
-                                # Process child fields
-                                for child_type, child_entries in entity.get("child_fields", {}).items():
-                                    for child_entry in child_entries:
-                                        proc_child = checkbox_processor.process_json_field(child_entry)
-                                        rows.append({
-                                            "Page": page_num,
-                                            "Level": "Child",
-                                            "Type": child_type,
-                                            "Value": proc_child.get('value', ''),
-                                            "Raw Value": proc_child.get('raw_value', ''),
-                                            "Confidence": f"{proc_child.get('confidence', 0):.2%}"
-                                        })
-                        
-                        # Create DataFrame and write to Excel
-                        if rows:
-                            df_section = pd.DataFrame(rows)
-                            df_section.to_excel(writer, sheet_name=sheet_name, index=False)
-                            
-                            # Format worksheet
-                            worksheet = writer.sheets[sheet_name]
-                            header_format = workbook.add_format({
-                                'bold': True,
-                                'bg_color': '#D3D3D3',
-                                'align': 'center'
-                            })
-                            
-                            # Apply formats
-                            for row_idx, row in enumerate(rows, 1):
-                                if row.get('Level') in ['Section Header', 'Parent', 'Person Header']:
-                                    worksheet.set_row(row_idx, None, header_format)
-                            
-                            self._adjust_column_widths(writer, sheet_name, df_section)
+                        # Process person entities
+                        for entity in child_entry.get("entities", []):
+                            proc_entity = process_field(entity)
+                            yield (
+                                page_num,
+                                "Entity",
+                                proc_entity.get('type', ''),
+                                proc_entity.get('value', ''),
+                                proc_entity.get('raw_value', ''),
+                                _confidence_value(proc_entity.get('confidence', 0))
+                            )
+                else:
+                    for child_entry in child_entries:
+                        proc_child = process_field(child_entry)
+                        yield (
+                            page_num,
+                            "Child",
+                            child_type,
+                            proc_child.get('value', ''),
+                            proc_child.get('raw_value', ''),
+                            _confidence_value(proc_child.get('confidence', 0))
+                        )
+
+    def _emit_parent_child_rows(self, section_type: str, section_data: List[Dict], page_num: int) -> Iterator[Tuple]:
+        """Yield a parent row per entity followed by its child field rows (default layout)"""
+        process_field = CheckboxProcessor.process_json_field
+        
+        for entity in section_data:
+            parent_proc = process_field(entity)
+            yield (
+                page_num,
+                "Parent",
+                section_type,
+                parent_proc.get('value', ''),
+                parent_proc.get('raw_value', ''),
+                _confidence_value(parent_proc.get('confidence', 0))
+            )
             
-            # Upload to GCS
-            bucket_name = bucket_name.replace('gs://', '')
-            bucket = self.storage_client.bucket(bucket_name)
+            # Process child fields
+            for child_type, child_entries in entity.get("child_fields", {}).items():
+                for child_entry in child_entries:
+                    proc_child = process_field(child_entry)
+                    yield (
+                        page_num,
+                        "Child",
+                        child_type,
+                        proc_child.get('value', ''),
+                        proc_child.get('raw_value', ''),
+                        _confidence_value(proc_child.get('confidence', 0))
+                    )
+
+    def _build_page_rows(self, page: Dict[str, Any], section_order: List[str]) -> List[Tuple[str, List[Tuple]]]:
+        """
+        Build Excel rows for every section of a single page
+        
+        Args:
+            page (Dict[str, Any]): Page entry with hierarchical fields
+            section_order (List[str]): Sections to emit, in sheet order
+        
+        Returns:
+            List of (section type, rows) tuples for the sections present on the page,
+            with rows in SECTION_SHEET_COLUMNS order
+        """
+        page_num = page["page_number"]
+        hierarchical_fields = page.get("hierarchical_fields", {})
+        page_rows = []
+        
+        for section_type in section_order:
+            section_data = hierarchical_fields.get(section_type, [])
             
-            full_blob_path = f"{prefix}/{filename}" if prefix else filename
-            full_blob_path = full_blob_path.replace('//', '/')
+            if not section_data:
+                continue
             
-            blob = bucket.blob(full_blob_path)
-            blob.upload_from_filename('temp_output.xlsx')
+            # Dispatch to the row emitter for this section layout
+            emit_rows = self.section_row_emitters.get(section_type, self._emit_parent_child_rows)
+            page_rows.append((section_type, list(emit_rows(section_type, section_data, page_num))))
+        
+        return page_rows
+
+    def _write_excel_workbook(self, data: Dict[str, Any]) -> io.BytesIO:
+        """Write crash report data to an in-memory Excel workbook and return the rewound buffer"""
+        output = io.BytesIO()
+
+        section_unique_trackers = {}
+        
+        # Process sections in a specific order
+        section_order = [
+            'identification_location', 
+            'vehicle_driver_persons', 
+            'factors_conditions', 
+            'charges', 
+            'damage', 
+            'disposition_of_injured_killed', 
+            'investigator', 
+            'narrative'
+        ]
+        
+        # Build rows for all pages concurrently
+        pages = data.get("pages", [])
+        with ThreadPoolExecutor(max_workers=min(8, max(len(pages), 1))) as executor:
+            page_results = list(executor.map(
+                lambda page: self._build_page_rows(page, section_order), 
+                pages
+            ))
+        
+        # Create Excel writer with xlsxwriter engine (not thread-safe, so sheets are written here).
+        # constant_memory streams each row to disk as soon as it is written.
+        with pd.ExcelWriter(
+            output, 
+            engine='xlsxwriter',
+            engine_kwargs={'options': {
+                'constant_memory': True,
+                'strings_to_formulas': False,
+                'strings_to_urls': False
+            }}
+        ) as writer:
+            workbook = writer.book
+            
+            # Create the formats once and share them across all sheets
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#D3D3D3',
+                'align': 'center'
+            })
+            cell_format = workbook.add_format({})
+            percent_format = workbook.add_format({'num_format': '0.00%'})
+            header_percent_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#D3D3D3',
+                'align': 'center',
+                'num_format': '0.00%'
+            })
             
-            # Clean up temporary file
-            os.remove('temp_output.xlsx')
+            for page, page_rows in zip(pages, page_results):
+                page_num = page["page_number"]
+                
+                for section_type, rows in page_rows:
+                    # Increment section tracker
+                    if section_type not in section_unique_trackers:
+                        section_unique_trackers[section_type] = 0
+                    section_unique_trackers[section_type] += 1
+                    
+                    # Generate sheet name
+                    sheet_name = f"P{page_num}_{section_type}_{section_unique_trackers[section_type]}"[:31]
+                    
+                    # Write the sheet row by row, bypassing pandas' per-cell formatter
+                    if rows:
+                        worksheet = workbook.add_worksheet(sheet_name)
+                        self._format_worksheet(
+                            worksheet, 
+                            SECTION_SHEET_COLUMNS, 
+                            rows, 
+                            header_format, 
+                            cell_format, 
+                            percent_formats=(percent_format, header_percent_format)
+                        )
+                        self._adjust_column_widths(worksheet, SECTION_SHEET_COLUMNS, rows)
+        
+        output.seek(0)
+        return output
+
+    def save_excel_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> str:
+        """Save crash report data to Excel with enhanced processing"""
+        try:
+            excel_buffer = self._write_excel_workbook(data)
+            
+            # Upload to GCS
+            bucket_name, full_blob_path = _resolve_blob_path(bucket_name, filename, prefix)
+            bucket = self._get_bucket(bucket_name)
+            
+            # A known size lets the upload start without probing the stream; small
+            # workbooks go up in one request without resumable chunking
+            excel_size = excel_buffer.getbuffer().nbytes
+            blob = bucket.blob(full_blob_path, chunk_size=_upload_chunk_size(excel_size))
+            blob.upload_from_file(
+                excel_buffer,
+                rewind=True,
+                size=excel_size,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                if_generation_match=0
+            )
             
             return f"gs://{bucket_name}/{full_blob_path}"
             
         except Exception as e:
             st.error(f"Excel Save Error: {str(e)}")
-            # Clean up temp file if it exists
-            if os.path.exists('temp_output.xlsx'):
-                os.remove('temp_output.xlsx')
             raise
 
-    def _format_worksheet(self, worksheet, df, header_format, cell_format):
-        """Apply formatting to worksheet"""
-        # Set column widths
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(str(col))
-            ) + 2
-            worksheet.set_column(idx, idx, min(max_length, 50))
-        
-        # Format headers
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # Format cells
-        for row_num in range(len(df)):
-            for col_num in range(len(df.columns)):
-                worksheet.write(row_num + 1, col_num, df.iloc[row_num, col_num], cell_format)
+    def _format_worksheet(self, worksheet, columns, rows, header_format, cell_format=None, percent_formats=None):
+        """
+        Write a header row and data rows to a worksheet with one write_row call per row
+        
+        Rows are written in order so this works with constant_memory workbooks;
+        header-level rows get the header format as they are written. When
+        percent_formats (cell, header) is given, the trailing Confidence column
+        is written as a number with that format.
+        """
+        worksheet.write_row(0, 0, columns, header_format)
+        last_col = len(columns) - 1
+        
+        for row_idx, row in enumerate(rows, 1):
+            is_header_row = row[1] in HEADER_LEVELS
+            row_format = header_format if is_header_row else cell_format
+            
+            if percent_formats is None:
+                worksheet.write_row(row_idx, 0, row, row_format)
+            else:
+                worksheet.write_row(row_idx, 0, row[:last_col], row_format)
+                worksheet.write(row_idx, last_col, row[last_col], percent_formats[1] if is_header_row else percent_formats[0])
 
     def _process_section_data(self, section_name: str, entities: List[Dict], fields: Union[List[str], Dict]) -> pd.DataFrame:
         """
@@ -723,182 +884,186 @@ class DocumentAIProcessor:
         Returns:
             pd.DataFrame: Processed entities with hierarchical information
         """
+        # Extracted rows are kept as parallel column lists rather than one dict per row
+        parent_field_col = []
+        type_col = []
+        value_col = []
+        confidence_col = []
+        page_number_col = []
+        
+        def _append_row(parent_field: str, entity_type: str, value: str, entity: Dict):
+            parent_field_col.append(parent_field)
+            type_col.append(entity_type)
+            value_col.append(value)
+            confidence_col.append(float(entity.get('confidence', 0) or 0))
+            page_number_col.append(entity.get("page_number", ""))
+        
         def _extract_hierarchical_entities(
-            current_entities: List[Dict], 
+            current_entities: List[Tuple[str, Dict]], 
             current_fields: Union[List[str], Dict], 
             parent_field: str = ''
-        ) -> List[Dict]:
+        ):
             """
-            Recursively extract entities based on the field hierarchy
+            Recursively extract entities based on the field hierarchy into the column lists
             
             Args:
-                current_entities (List[Dict]): Entities to process
-                current_fields (Union[List[str], Dict]): Fields to extract
+                current_entities (List[Tuple[str, Dict]]): (lowercase type, entity) pairs to process
+                current_fields (Union[List[str], Dict]): Lowercase fields to extract
                 parent_field (str, optional): Parent field name
-            
-            Returns:
-                List[Dict]: Extracted hierarchical entities
             """
-            extracted_entities = []
-            
             # Handle list of simple fields
             if isinstance(current_fields, list):
-                for entity in current_entities:
-                    entity_type = str(entity.get("type", "")).lower()
-                    
+                field_types = set(current_fields)
+                
+                for entity_type, entity in current_entities:
                     # Check if entity type matches any of the fields
-                    if entity_type in [str(f).lower() for f in current_fields]:
-                        extracted_entities.append({
-                            "parent_field": parent_field,
-                            "type": entity_type,
-                            "value": str(entity.get("value", "")),
-                            "confidence": f"{entity.get('confidence', 0):.2%}",
-                            "page_number": entity.get("page_number", "")
-                        })
+                    if entity_type in field_types:
+                        _append_row(parent_field, entity_type, str(entity.get("value", "")), entity)
             
             # Handle nested dictionary structure
             elif isinstance(current_fields, dict):
-                for field, subfields in current_fields.items():
-                    # Convert field to string and lowercase
-                    field_str = str(field).lower()
-                    
+                # Bucket entities by lowercase type once, keeping their original order
+                entities_by_type = {}
+                for pair in current_entities:
+                    entities_by_type.setdefault(pair[0], []).append(pair)
+                
+                for field_str, subfields in current_fields.items():
                     # Find entities matching the current field
-                    matching_entities = [
-                        e for e in current_entities 
-                        if str(e.get("type", "")).lower() == field_str
-                    ]
+                    matching_entities = entities_by_type.get(field_str, [])
                     
                     # Add parent field entry if matching entities exist
                     if matching_entities:
                         # Add the parent field entry
-                        extracted_entities.append({
-                            "parent_field": parent_field,
-                            "type": field_str,
-                            "value": "",
-                            "confidence": f"{matching_entities[0].get('confidence', 0):.2%}",
-                            "page_number": matching_entities[0].get("page_number", "")
-                        })
+                        _append_row(parent_field, field_str, "", matching_entities[0][1])
                         
                         # Recursively process subfields
-                        extracted_entities.extend(
-                            _extract_hierarchical_entities(
-                                matching_entities, 
-                                subfields, 
-                                parent_field=field_str
-                            )
+                        _extract_hierarchical_entities(
+                            matching_entities, 
+                            subfields, 
+                            parent_field=field_str
                         )
-            
-            return extracted_entities
         
         # Main processing: extract entities based on fields
         try:
-            processed_rows = _extract_hierarchical_entities(entities, fields)
-            
-            # Convert to DataFrame, return empty DataFrame if no rows
-            return pd.DataFrame(processed_rows) if processed_rows else pd.DataFrame()
+            # Lowercase the field names and entity types once for the whole recursion
+            if fields is self._FIELD_HIERARCHY:
+                fields = self._FIELD_HIERARCHY_LOWER
+            else:
+                fields = _lowercase_field_hierarchy(fields)
+            typed_entities = [(str(entity.get("type", "")).lower(), entity) for entity in entities]
+            
+            _extract_hierarchical_entities(typed_entities, fields)
+            
+            # Build the DataFrame column-wise, return empty DataFrame if no rows
+            if not type_col:
+                return pd.DataFrame()
+            return pd.DataFrame({
+                "parent_field": parent_field_col,
+                "type": type_col,
+                "value": value_col,
+                "confidence": confidence_col,
+                "page_number": page_number_col
+            }, copy=False)
         
         except Exception as e:
             # Log any unexpected errors during processing
             print(f"Error processing section {section_name}: {e}")
             return pd.DataFrame()
 
-    def _adjust_column_widths(self, writer, sheet_name, df):
-        """Adjust column widths in Excel worksheet"""
-        worksheet = writer.sheets[sheet_name]
-        for idx, col in enumerate(df.columns):
-            # Get maximum length of column items
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(str(col))
-            ) + 2
-            worksheet.set_column(idx, idx, min(max_length, 50))  # Cap width at 50
+    def _adjust_column_widths(self, worksheet, columns, rows):
+        """Adjust column widths in Excel worksheet from the header and row tuples written to it"""
+        # Longest cell per column (stringified) and longest header, in one array pass
+        header_lengths = np.fromiter((len(str(col)) for col in columns), dtype=np.int64, count=len(columns))
+        if rows:
+            cell_lengths = _str_len(np.array([[str(value) for value in row] for row in rows], dtype=object)).max(axis=0)
+            max_lengths = np.maximum(cell_lengths, header_lengths)
+        else:
+            max_lengths = header_lengths
+        
+        widths = np.minimum(max_lengths + 2, 50)  # Cap width at 50
+        for idx, width in enumerate(widths):
+            worksheet.set_column(idx, idx, int(width))
 
-    def _get_field_hierarchy(self) -> Dict[str, Union[List[str], Dict]]:
-        """Define the hierarchical structure of fields"""
-        return {
-            'charges': {
-                'unit_num': ['charge', 'citation_ref_num', 'person_num_charges', 'unit_num_charges']
-            },
-            'cmv': [
-                'actual_gross_weight', 'bus_type_cmv', 'capacity_cmv', 'cargo_body_type',
-                'carrier_corp_name', 'carrier_id_num', 'carrier_id_type_cmv', 
-                'carrier_primary_address', 'cmv_disabling_damage', 'disabling_damage_cmv',
-                'hazmat_class_num', 'hazmat_id_num', 'hazmat_released', 'intermodal_shipping',
-                'lbs_cmv', 'rgvw_gvwr', 'rgvw_gvwr_tick_box', 'sequence_event_1',
-                'sequence_event_2', 'sequence_event_3', 'sequence_event_4', 'total_num_axies',
-                'transporting_hazardous_material_cmv', 'trlr_type', 'unit_num_cmv',
-                'veh_oper_cmv', 'veh_type_cmv'
-            ],
-            'damage': {
-                'damaged_property_other_than_vehicle': [
-                    'damaged_property', 'owner_address_damage', 'owner_name_damage'
-                ]
-            },
-            'disposition_of_injured_killed': {
-                'unit_num_disposition': [
-                    'date_of_death', 'person_num_disposition', 'taken_by', 'taken_to',
-                    'time_of_death', 'unit_num_disp'
-                ]
-            },
-            'factors_conditions': {
-                'unit_contributing_factors': [
-                    'contributing_contributing_factors', 'contributing_vehicle_defects',
-                    'entering_roads', 'light_cond', 'may_have_contrib_vehicle_defects',
-                    'may_have_contributing_factors', 'roadway_alignment', 'roadway_type',
-                    'surface_condition', 'traffic_control', 'unit_num_contributing',
-                    'weather_cond'
-                ]
-            },
-            'identification_location': [
-                'block_num', 'case_id', 'city_name', 'const_zone', 'country_name',
-                'crash_damage_1000', 'crash_date', 'crash_time', 'dir_from_int_or_ref_marker',
-                'dir_of_traffic', 'distance_from_int_of_ref_marker', 'hwy_num', 'latitude',
-                'local_use', 'longitude', 'outside_city_limit', 'rdwy_part', 'rdwy_sys',
-                'ref_marker', 'rrx_num', 'speed_limit', 'street_desc', 'street_name',
-                'street_prefix', 'street_suffix', 'worker_present'
-            ],
-            'investigator': [
-                'agency_name', 'date_arrived', 'date_notified', 'date_roadway',
-                'date_scene_cleared', 'how_notified', 'id_num_investigator',
-                'investigation_complete', 'investigator_name', 'ori_num', 'report_date',
-                'service_region_da', 'time_arrived', 'time_notified', 'time_roadway',
-                'time_scene_cleared'
-            ],
-            'narrative': ['investigator_narrative_opinion'],
-            'vehicle_driver_persons': [
-                'address', 'autonomous_level_engaged', 'autonomous_unit', 'body_style',
-                'cdl_end', 'dl_class', 'dl_id_num', 'dl_id_state', 'dl_id_type', 'dl_rest',
-                'dob', 'fin_resp_name', 'fin_resp_number', 'fin_resp_phone_num',
-                'fin_resp_type', 'hit_and_run', 'lp_num', 'lp_state', 'owner_address',
-                'owner_lesse_tick_box', 'owner_name', 'parked_vehicle',
-                'proof_of_fin_resp', 'towed_by', 'towed_to', 'unit_desc', 'unit_num',
-                'veh_color', 'veh_make', 'veh_model', 'veh_year',
-                'vehicle_damage_rating', 'vehicle_damage_rating2', 'vin', 
-                {
-                    'person_num': [
-                        'person_description', 'person_name', 'person_num1',
-                        'person_seat_position', 'person_type'
-                    ]
-                }
+    # Hierarchical structure of fields, built once for the class
+    _FIELD_HIERARCHY = {
+        'charges': {
+            'unit_num': ['charge', 'citation_ref_num', 'person_num_charges', 'unit_num_charges']
+        },
+        'cmv': [
+            'actual_gross_weight', 'bus_type_cmv', 'capacity_cmv', 'cargo_body_type',
+            'carrier_corp_name', 'carrier_id_num', 'carrier_id_type_cmv', 
+            'carrier_primary_address', 'cmv_disabling_damage', 'disabling_damage_cmv',
+            'hazmat_class_num', 'hazmat_id_num', 'hazmat_released', 'intermodal_shipping',
+            'lbs_cmv', 'rgvw_gvwr', 'rgvw_gvwr_tick_box', 'sequence_event_1',
+            'sequence_event_2', 'sequence_event_3', 'sequence_event_4', 'total_num_axies',
+            'transporting_hazardous_material_cmv', 'trlr_type', 'unit_num_cmv',
+            'veh_oper_cmv', 'veh_type_cmv'
+        ],
+        'damage': {
+            'damaged_property_other_than_vehicle': [
+                'damaged_property', 'owner_address_damage', 'owner_name_damage'
             ]
-        }
+        },
+        'disposition_of_injured_killed': {
+            'unit_num_disposition': [
+                'date_of_death', 'person_num_disposition', 'taken_by', 'taken_to',
+                'time_of_death', 'unit_num_disp'
+            ]
+        },
+        'factors_conditions': {
+            'unit_contributing_factors': [
+                'contributing_contributing_factors', 'contributing_vehicle_defects',
+                'entering_roads', 'light_cond', 'may_have_contrib_vehicle_defects',
+                'may_have_contributing_factors', 'roadway_alignment', 'roadway_type',
+                'surface_condition', 'traffic_control', 'unit_num_contributing',
+                'weather_cond'
+            ]
+        },
+        'identification_location': [
+            'block_num', 'case_id', 'city_name', 'const_zone', 'country_name',
+            'crash_damage_1000', 'crash_date', 'crash_time', 'dir_from_int_or_ref_marker',
+            'dir_of_traffic', 'distance_from_int_of_ref_marker', 'hwy_num', 'latitude',
+            'local_use', 'longitude', 'outside_city_limit', 'rdwy_part', 'rdwy_sys',
+            'ref_marker', 'rrx_num', 'speed_limit', 'street_desc', 'street_name',
+            'street_prefix', 'street_suffix', 'worker_present'
+        ],
+        'investigator': [
+            'agency_name', 'date_arrived', 'date_notified', 'date_roadway',
+            'date_scene_cleared', 'how_notified', 'id_num_investigator',
+            'investigation_complete', 'investigator_name', 'ori_num', 'report_date',
+            'service_region_da', 'time_arrived', 'time_notified', 'time_roadway',
+            'time_scene_cleared'
+        ],
+        'narrative': ['investigator_narrative_opinion'],
+        'vehicle_driver_persons': [
+            'address', 'autonomous_level_engaged', 'autonomous_unit', 'body_style',
+            'cdl_end', 'dl_class', 'dl_id_num', 'dl_id_state', 'dl_id_type', 'dl_rest',
+            'dob', 'fin_resp_name', 'fin_resp_number', 'fin_resp_phone_num',
+            'fin_resp_type', 'hit_and_run', 'lp_num', 'lp_state', 'owner_address',
+            'owner_lesse_tick_box', 'owner_name', 'parked_vehicle',
+            'proof_of_fin_resp', 'towed_by', 'towed_to', 'unit_desc', 'unit_num',
+            'veh_color', 'veh_make', 'veh_model', 'veh_year',
+            'vehicle_damage_rating', 'vehicle_damage_rating2', 'vin', 
+            {
+                'person_num': [
+                    'person_description', 'person_name', 'person_num1',
+                    'person_seat_position', 'person_type'
+                ]
+            }
+        ]
+    }
 
-    def _adjust_column_widths(self, writer, sheet_name, df):
-        """Adjust column widths in Excel worksheet"""
-        worksheet = writer.sheets[sheet_name]
-        for idx, col in enumerate(df.columns):
-            # Get maximum length of column items
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(str(col))
-            ) + 2
-            worksheet.set_column(idx, idx, min(max_length, 50))  # Cap width at 50
+    # Same hierarchy with lowercase keys, as matched against entity types
+    _FIELD_HIERARCHY_LOWER = _lowercase_field_hierarchy(_FIELD_HIERARCHY)
+
+    def _get_field_hierarchy(self) -> Dict[str, Union[List[str], Dict]]:
+        """Define the hierarchical structure of fields"""
+        return self._FIELD_HIERARCHY
 
     def process_document_page_by_page(
         self, 
         input_file_path: str, 
         processor_id: str,
-        cleanup: bool = True,
         max_retries: int = 3,
         retry_delay: int = 5
     ) -> Dict[str, Any]:
@@ -908,26 +1073,19 @@ class DocumentAIProcessor:
         Args:
             input_file_path (str): Path to the input PDF file
             processor_id (str): Document AI processor ID
-            cleanup (bool): Whether to remove temporary page files after processing
             max_retries (int): Maximum number of retries for failed pages
             retry_delay (int): Delay between retries in seconds
         
         Returns:
             Dict[str, Any]: Processed document results
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        import concurrent.futures
-        import time
-        import logging
-        
-        # Configure logging
-        logging.basicConfig(level=logging.INFO, 
-                            format='%(asctime)s - %(levelname)s - %(message)s')
-        logger = logging.getLogger(__name__)
-        
-        # Split PDF into individual page files
+        # Split PDF into individual in-memory pages
         page_splitter = DocumentPageSplitter(input_file_path)
-        page_files = page_splitter.split_pdf_pages()
+        total_pages = page_splitter.page_count()
+        
+        # Pages are rendered lazily, so the first ones are already being
+        # processed while later ones are still being split
+        page_contents = page_splitter.iter_page_bytes()
         
         # Initialize document result structure
         full_document_result = {
@@ -937,16 +1095,15 @@ class DocumentAIProcessor:
         
         # Create progress tracking
         progress_bar = st.progress(0)
-        total_pages = len(page_files)
         progress_text = st.empty()
         
-        def process_page_with_retry(file_path: str, page_num: int) -> Dict[str, Any]:
+        def process_page_with_retry(page_num: int, pdf_content: bytes) -> Dict[str, Any]:
             """
             Process a single page with retry mechanism
             
             Args:
-                file_path (str): Path to the page file
                 page_num (int): Page number
+                pdf_content (bytes): Single-page PDF content
             
             Returns:
                 Dict containing processed page data
@@ -958,7 +1115,7 @@ class DocumentAIProcessor:
                     # Process the page
                     processed_page = self.process_page(
                         processor_id=processor_id, 
-                        file_path=file_path, 
+                        pdf_content=pdf_content, 
                         page_number=page_num
                     )
                     
@@ -977,96 +1134,102 @@ class DocumentAIProcessor:
         
         try:
             # Determine optimal number of workers
-            max_workers = min(10, total_pages)
+            max_workers = max(1, min(self.max_concurrency, total_pages))
+            
+            def process_page_or_error(page_num: int, page_content: bytes):
+                """Process one page with retries, returning the error instead of raising it"""
+                try:
+                    return process_page_with_retry(
+                        page_num=page_num,
+                        pdf_content=page_content
+                    ), None
+                except Exception as e:
+                    return None, e
+            
+            # The splitter renders pages lazily and a new page is only pulled once
+            # the window has room, so at most max_in_flight page buffers are alive
+            max_in_flight = max_workers * 2
+            
+            def iter_page_results(executor):
+                """Submit pages as the window frees up, yielding results in page order"""
+                in_flight = deque()
+                for page_num, page_content in enumerate(page_contents, 1):
+                    if len(in_flight) >= max_in_flight:
+                        yield in_flight.popleft().result()
+                    in_flight.append(executor.submit(process_page_or_error, page_num, page_content))
+                
+                while in_flight:
+                    yield in_flight.popleft().result()
             
             # Use ThreadPoolExecutor for concurrent processing
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit processing tasks for each page
-                future_to_page = {
-                    executor.submit(
-                        process_page_with_retry, 
-                        file_path=page_file, 
-                        page_num=i
-                    ): i 
-                    for i, page_file in enumerate(page_files, 1)
-                }
-                
-                # Process completed futures in order
-                processed_pages = [None] * total_pages
+                page_results = iter_page_results(executor)
                 
-                # Collect results as they complete
-                for future in as_completed(future_to_page):
-                    page_num = future_to_page[future]
-                    try:
-                        # Update progress
-                        progress_text.text(f"Processing page {page_num} of {total_pages}")
-                        progress_bar.progress(page_num / total_pages)
-                        
-                        # Process the page
-                        processed_page = future.result()
+                successful_pages = []
+                for page_num, (processed_page, error) in enumerate(page_results, 1):
+                    # Update progress
+                    progress_text.text(f"Processing page {page_num} of {total_pages}")
+                    progress_bar.progress(page_num / total_pages)
+                    
+                    # Skip failed pages
+                    if error is not None:
+                        logger.error(f"Error processing page {page_num}: {str(error)}")
+                        continue
+                    
+                    # Prepare page data
+                    page_data = {
+                        "page_number": page_num,
+                        "text": processed_page.get('text', ''),
+                        "hierarchical_fields": {}
+                    }
+                    
+                    # Process each section
+                    hierarchical_fields = page_data["hierarchical_fields"]
+                    for section, entities in processed_page.get('sections', {}).items():
+                        if not entities:
+                            continue
                         
-                        # Prepare page data
-                        page_data = {
-                            "page_number": page_num,
-                            "text": processed_page.get('text', ''),
-                            "hierarchical_fields": {}
-                        }
+                        # Bind the section list once for all of its entities
+                        append_parent = hierarchical_fields.setdefault(section, []).append
                         
-                        # Process each section
-                        for section, entities in processed_page.get('sections', {}).items():
-                            if not entities:
-                                continue
-                            
-                            # Initialize section in hierarchical fields if not exists
-                            if section not in page_data["hierarchical_fields"]:
-                                page_data["hierarchical_fields"][section] = []
+                        # Process each entity in the section
+                        for entity in entities:
+                            child_fields = {}
+                            parent_entry = {
+                                "type": entity["type"],
+                                "value": entity.get('value', ''),
+                                "confidence": entity.get('confidence', 0),
+                                "child_fields": child_fields
+                            }
                             
-                            # Process each entity in the section
-                            for entity in entities:
-                                parent_entry = {
-                                    "type": entity["type"],
-                                    "value": entity.get('value', ''),
-                                    "confidence": entity.get('confidence', 0),
-                                    "child_fields": {}
+                            # Process child entities
+                            for child in entity.get("child_entities", []):
+                                child_type = child["type"]
+                                grandchild_entries = []
+                                child_entry = {
+                                    "type": child_type,
+                                    "value": child.get('value', ''),
+                                    "confidence": child.get('confidence', 0),
+                                    "entities": grandchild_entries
                                 }
                                 
-                                # Process child entities
-                                for child in entity.get("child_entities", []):
-                                    child_type = child["type"]
-                                    if child_type not in parent_entry["child_fields"]:
-                                        parent_entry["child_fields"][child_type] = []
-                                    
-                                    child_entry = {
-                                        "type": child_type,
-                                        "value": child.get('value', ''),
-                                        "confidence": child.get('confidence', 0),
-                                        "entities": []
-                                    }
-                                    
-                                    # Process grandchild entities
-                                    for grandchild in child.get("child_entities", []):
-                                        entity_entry = {
-                                            "type": grandchild["type"],
-                                            "value": grandchild.get('value', ''),
-                                            "confidence": grandchild.get('confidence', 0)
-                                        }
-                                        child_entry["entities"].append(entity_entry)
-                                    
-                                    parent_entry["child_fields"][child_type].append(child_entry)
+                                # Process grandchild entities
+                                append_grandchild = grandchild_entries.append
+                                for grandchild in child.get("child_entities", []):
+                                    append_grandchild({
+                                        "type": grandchild["type"],
+                                        "value": grandchild.get('value', ''),
+                                        "confidence": grandchild.get('confidence', 0)
+                                    })
                                 
-                                # Add parent entry to appropriate section
-                                page_data["hierarchical_fields"][section].append(parent_entry)
+                                child_fields.setdefault(child_type, []).append(child_entry)
                             
-                        # Store page in the correct order
-                        processed_pages[page_num - 1] = page_data
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing page {page_num}: {str(e)}")
-                        # Store None for failed pages to maintain order
-                        processed_pages[page_num - 1] = None
+                            # Add parent entry to appropriate section
+                            append_parent(parent_entry)
+                        
+                    successful_pages.append(page_data)
                 
-                # Filter out failed pages and add to final result
-                successful_pages = [page for page in processed_pages if page is not None]
+                # Add successful pages to final result
                 full_document_result["pages"] = successful_pages
                 
                 # Log processing summary
@@ -1077,7 +1240,7 @@ class DocumentAIProcessor:
                     page.get('text', '') for page in full_document_result["pages"]
                 )
         
-        except concurrent.futures.CancelledError:
+        except CancelledError:
             logger.error("Document processing was cancelled")
             st.error("Document processing was cancelled")
             raise
@@ -1088,17 +1251,10 @@ class DocumentAIProcessor:
             raise
         
         finally:
-            # Clean up progress indicators
+            # Clean up progress indicators and release the source PDF
             progress_bar.empty()
             progress_text.empty()
-            
-            # Remove temporary page files if cleanup is requested
-            if cleanup:
-                for page_file in page_files:
-                    try:
-                        os.remove(page_file)
-                    except Exception as cleanup_error:
-                        logger.warning(f"Could not remove temporary file {page_file}: {cleanup_error}")
+            page_splitter.close()
         
         return full_document_result
 
@@ -1106,9 +1262,22 @@ class DocumentAIProcessor:
         """Display document results with a flat hierarchy structure"""
         # Remove the duplicate "Document Analysis Results" header
         
-        for page in document_result.get("pages", []):
+        pages = document_result.get("pages", [])
+        expanded = False
+        
+        # Large documents only build the widgets of the selected page on each rerun
+        if len(pages) > RESULTS_PAGE_PICKER_THRESHOLD:
+            selected_index = st.selectbox(
+                "Jump to page",
+                range(len(pages)),
+                format_func=lambda index: f"Page {pages[index]['page_number']}"
+            )
+            pages = pages[selected_index:selected_index + 1]
+            expanded = True
+        
+        for page in pages:
             page_num = page["page_number"]
-            with st.expander(f"Page {page_num}"):
+            with st.expander(f"Page {page_num}", expanded=expanded):
                 # Create sections for different parent types
                 for parent_type, parent_entities in page.get("hierarchical_fields", {}).items():
                     if parent_entities:  # Only show sections with data
@@ -1127,44 +1296,38 @@ class DocumentAIProcessor:
                                     st.markdown(f"**Value:** {parent_entity['value']}")
                                 st.markdown(f"**Confidence:** {parent_entity['confidence']:.2%}")
                                 
-                                # Process child fields
-                                child_fields = parent_entity.get("child_fields", {})
-                                if child_fields:
-                                    for child_type, child_entries in child_fields.items():
-                                        if child_entries:
-                                            st.markdown(f"### {child_type.replace('_', ' ').title()}")
-                                            
-                                            # Create DataFrame for child entries and their entities
-                                            all_data = []
-                                            
-                                            for child_entry in child_entries:
-                                                # Add child entry data
-                                                if child_entry.get('value'):
-                                                    child_row = {
-                                                        "Level": "Child Field",
-                                                        "Type": child_type,
-                                                        "Value": child_entry['value'],
-                                                        "Confidence": f"{child_entry['confidence']:.2%}"
-                                                    }
-                                                    all_data.append(child_row)
-                                                
-                                                # Add entity data
-                                                for entity in child_entry.get("entities", []):
-                                                    entity_row = {
-                                                        "Level": "Entity",
-                                                        "Type": entity['type'],
-                                                        "Value": entity['value'],
-                                                        "Confidence": f"{entity['confidence']:.2%}"
-                                                    }
-                                                    all_data.append(entity_row)
-                                            
-                                            if all_data:
-                                                df = pd.DataFrame(all_data)
-                                                st.dataframe(
-                                                    df,
-                                                    use_container_width=True,
-                                                    hide_index=True
-                                                )
+                                # Process child fields into one table for the whole entity
+                                section_rows = []
+                                for child_type, child_entries in parent_entity.get("child_fields", {}).items():
+                                    child_label = child_type.replace('_', ' ').title()
+                                    for child_entry in child_entries:
+                                        # Add child entry data
+                                        if child_entry.get('value'):
+                                            section_rows.append((
+                                                child_label,
+                                                "Child Field",
+                                                child_type,
+                                                child_entry['value'],
+                                                f"{child_entry['confidence']:.2%}"
+                                            ))
+                                        
+                                        # Add entity data
+                                        for entity in child_entry.get("entities", []):
+                                            section_rows.append((
+                                                child_label,
+                                                "Entity",
+                                                entity['type'],
+                                                entity['value'],
+                                                f"{entity['confidence']:.2%}"
+                                            ))
+                                
+                                if section_rows:
+                                    df = pd.DataFrame.from_records(section_rows, columns=RESULT_TABLE_COLUMNS)
+                                    st.dataframe(
+                                        df,
+                                        use_container_width=True,
+                                        hide_index=True
+                                    )
                                 
                                 st.markdown("---")
                     
@@ -1186,27 +1349,22 @@ class DocumentAIProcessor:
             str: GCS URI of the saved JSON file
         """
         try:
-            # Remove 'gs://' if present
-            bucket_name = bucket_name.replace('gs://', '')
-            
-            # Create storage client
-            bucket = self.storage_client.bucket(bucket_name)
-            
             # Prepare the full blob path
-            json_filename = filename.replace('.xlsx', '.json')
-            full_blob_path = f"{prefix}/{json_filename}" if prefix else json_filename
-            full_blob_path = full_blob_path.replace('//', '/')
+            bucket_name, full_blob_path = _resolve_blob_path(
+                bucket_name, filename.replace('.xlsx', '.json'), prefix
+            )
+            
+            # Get cached bucket handle
+            bucket = self._get_bucket(bucket_name)
             
             # Create JSON blob
             blob = bucket.blob(full_blob_path)
             
-            # Convert data to JSON string with proper formatting
-            json_str = json.dumps(data, indent=2, ensure_ascii=False)
-            
-            # Upload JSON to GCS
+            # Upload the encoded JSON bytes to GCS
             blob.upload_from_string(
-                json_str,
-                content_type='application/json'
+                self._build_json_payload(data),
+                content_type='application/json',
+                if_generation_match=0
             )
             
             return f"gs://{bucket_name}/{full_blob_path}"
@@ -1215,339 +1373,501 @@ class DocumentAIProcessor:
             st.error(f"Error saving JSON to GCS: {str(e)}")
             raise
 
+    def _build_json_payload(self, data: Dict[str, Any]) -> bytes:
+        """Serialize document processing results to compact UTF-8 encoded JSON"""
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def save_results_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> Tuple[str, str]:
+        """
+        Save the document processing results as JSON and Excel in one batched upload
+        
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            data (Dict[str, Any]): Document processing results
+            filename (str): Base name of the output files (without extension)
+            prefix (str, optional): Folder prefix in the bucket
+            
+        Returns:
+            Tuple[str, str]: GCS URIs of the saved JSON and Excel files
+        """
+        try:
+            bucket_name, json_blob_path = _resolve_blob_path(bucket_name, filename, prefix)
+            bucket = self._get_bucket(bucket_name)
+            
+            json_payload = self._build_json_payload(data)
+            excel_buffer = self._write_excel_workbook(data)
+            
+            # Prepare the blobs
+            excel_blob_path = f"{json_blob_path}.xlsx"
+            
+            json_blob = bucket.blob(json_blob_path)
+            json_blob.content_type = 'application/json'
+            excel_blob = bucket.blob(excel_blob_path)
+            
+            # Upload both files concurrently instead of one after the other
+            transfer_manager.upload_many(
+                [(io.BytesIO(json_payload), json_blob), (excel_buffer, excel_blob)],
+                upload_kwargs={'if_generation_match': 0},
+                raise_exception=True,
+                worker_type=transfer_manager.THREAD,
+                max_workers=2
+            )
+            
+            return f"gs://{bucket_name}/{json_blob_path}", f"gs://{bucket_name}/{excel_blob_path}"
+            
+        except Exception as e:
+            st.error(f"Error saving results to GCS: {str(e)}")
+            raise
+
+# Crash report code tables, shared read-only by CrashReportDataDictionary
+ROADWAY_SYSTEM = MappingProxyType({
+    'IH': 'Interstate',
+    'US': 'US Highway',
+    'SH': 'State Highway',
+    'FM': 'Farm to Market',
+    'RR': 'Ranch Road',
+    'RM': 'Ranch to Market',
+    'BI': 'Business Interstate',
+    'BU': 'Business US',
+    'BS': 'Business State',
+    'BF': 'Business FM',
+    'SL': 'State Loop',
+    'TL': 'Toll Road',
+    'AL': 'Alternate',
+    'SP': 'Spur',
+    'CR': 'County Road',
+    'PR': 'Park Road',
+    'PV': 'Private Road',
+    'RC': 'Recreational Road',
+    'LR': 'Local Road/Street'
+})
+
+ROADWAY_PART = MappingProxyType({
+    '1': 'Main/Proper Lane',
+    '2': 'Service/Frontage Road',
+    '3': 'Entrance/On Ramp',
+    '4': 'Exit/Off Ramp',
+    '5': 'Connector/Flyover',
+    '98': 'Other'
+})
+
+DIRECTION = MappingProxyType({
+    'N': 'North',
+    'E': 'East',
+    'S': 'South',
+    'W': 'West',
+    'NE': 'Northeast',
+    'SE': 'Southeast',
+    'SW': 'Southwest',
+    'NW': 'Northwest'
+})
+
+STREET_SUFFIX = MappingProxyType({
+    'RD': 'Road',
+    'ST': 'Street',
+    'DR': 'Drive',
+    'LOOP': 'Loop',
+    'EXPY': 'Expressway',
+    'CT': 'Court',
+    'CIR': 'Circle',
+    'PL': 'Place',
+    'PARK': 'Park',
+    'CV': 'Cove',
+    'PATH': 'Path',
+    'TRC': 'Trace',
+    'PT': 'Point',
+    'AVE': 'Avenue',
+    'BLVD': 'Boulevard',
+    'PKWY': 'Parkway',
+    'LN': 'Lane',
+    'FWY': 'Freeway',
+    'HWY': 'Highway',
+    'WAY': 'Way',
+    'TRL': 'Trail'
+})
+
+UNIT_DESCRIPTION = MappingProxyType({
+    '1': 'Motor Vehicle',
+    '2': 'Train',
+    '3': 'Pedalcyclist',
+    '4': 'Pedestrian',
+    '5': 'Motorized Conveyance',
+    '6': 'Towed/Pushed/Trailer',
+    '7': 'Non-Contact',
+    '98': 'Other'
+})
+
+VEHICLE_COLOR = MappingProxyType({
+    'BGE': 'Beige',
+    'BLK': 'Black',
+    'BLU': 'Blue',
+    'BRZ': 'Bronze',
+    'BRO': 'Brown',
+    'CAM': 'Camouflage',
+    'CPR': 'Copper',
+    'GLD': 'Gold',
+    'GRY': 'Gray',
+    'GRN': 'Green',
+    'MAR': 'Maroon',
+    'MUL': 'Multicolored',
+    'ONG': 'Orange',
+    'PNK': 'Pink',
+    'PLE': 'Purple',
+    'RED': 'Red',
+    'SIL': 'Silver',
+    'TAN': 'Tan',
+    'TEA': 'Teal',
+    'TRQ': 'Turquoise',
+    'WHI': 'White',
+    'YEL': 'Yellow',
+    '98': 'Other',
+    '99': 'Unknown'
+})
+
+BODY_STYLE = MappingProxyType({
+    'P2': 'Passenger Car, 2-Door',
+    'P4': 'Passenger Car, 4-Door',
+    'PK': 'Pickup',
+    'AM': 'Ambulance',
+    'BU': 'Bus',
+    'SB': 'Yellow School Bus',
+    'FE': 'Farm Equipment',
+    'FT': 'Fire Truck',
+    'MC': 'Motorcycle',
+    'PC': 'Police Car/Truck',
+    'PM': 'Police Motorcycle',
+    'TL': 'Trailer',
+    'TR': 'Truck',
+    'TT': 'Truck Tractor',
+    'VN': 'Van',
+    'EV': 'Neighborhood Vehicle',
+    'SV': 'Sport Utility Vehicle',
+    '98': 'Other',
+    '99': 'Unknown'
+})
+
+AUTONOMOUS_UNIT = MappingProxyType({
+    '1': 'Yes',
+    '2': 'No',
+    '99': 'Unknown'
+})
+
+AUTONOMOUS_LEVEL = MappingProxyType({
+    '0': 'No Automation',
+    '1': 'Driver Assistance',
+    '2': 'Partial Automation',
+    '3': 'Conditional Automation',
+    '4': 'High Automation',
+    '5': 'Full Automation',
+    '6': 'Automation Level Unknown',
+    '99': 'Unknown'
+})
+
+PERSON_TYPE = MappingProxyType({
+    '1': 'Driver',
+    '2': 'Passenger/Occupant',
+    '3': 'Pedalcyclist',
+    '4': 'Pedestrian',
+    '5': 'Driver of Motorcycle Type Vehicle',
+    '6': 'Passenger/Occupant on Motorcycle Type Vehicle',
+    '95': 'Autonomous',
+    '98': 'Other',
+    '99': 'Unknown'
+})
+
+INJURY_SEVERITY = MappingProxyType({
+    'A': 'Suspected Serious Injury',
+    'B': 'Suspected Minor Injury',
+    'C': 'Possible Injury',
+    'K': 'Fatal Injury',
+    'N': 'Not Injured',
+    '95': 'Autonomous',
+    '99': 'Unknown'
+})
+
+ETHNICITY = MappingProxyType({
+    'W': 'White',
+    'B': 'Black',
+    'H': 'Hispanic',
+    'A': 'Asian',
+    'I': 'American Indian/Alaskan Native',
+    '95': 'Autonomous',
+    '98': 'Other',
+    '99': 'Unknown'
+})
+
+FACTORS_AND_CONDITIONS = MappingProxyType({
+    '1': 'Animal on Road - Domestic',
+    '2': 'Animal on Road - Wild',
+    '3': 'Backed without Safety',
+    '4': 'Changed Lane when Unsafe',
+    '14': 'Disabled in Traffic Lane',
+    '15': 'Disregard Stop and Go Signal',
+    '16': 'Disregard Stop Sign or Light',
+    '19': 'Distraction in Vehicle',
+    '20': 'Driver Inattention',
+    '22': 'Failed to Control Speed',
+    '23': 'Failed to Drive in Single Lane',
+    '40': 'Fatigued or Asleep',
+    '41': 'Faulty Evasive Action',
+    '42': 'Fire in Vehicle',
+    '43': 'Fleeing or Evading Police',
+    '44': 'Followed Too Closely',
+    '45': 'Had Been Drinking',
+    '67': 'Intoxicated - Alcohol',
+    '68': 'Intoxicated - Drug',
+    '73': 'Road Rage',
+    '74': 'Cell/Mobile Device Use - Talking',
+    '75': 'Cell/Mobile Device Use - Texting',
+    '76': 'Cell/Mobile Device Use - Other',
+    '77': 'Cell/Mobile Device Use - Unknown'
+})
+
+WEATHER_CONDITION = MappingProxyType({
+    '1': 'Clear',
+    '2': 'Cloudy',
+    '3': 'Rain',
+    '4': 'Sleet/Hail',
+    '5': 'Snow',
+    '6': 'Fog',
+    '7': 'Blowing Sand/Snow',
+    '8': 'Severe Crosswinds',
+    '98': 'Other',
+    '99': 'Unknown'
+})
+
+LIGHT_CONDITION = MappingProxyType({
+    '1': 'Daylight',
+    '2': 'Dark, Not Lighted',
+    '3': 'Dark, Lighted',
+    '4': 'Dark, Unknown Lighting',
+    '5': 'Dawn',
+    '6': 'Dusk',
+    '98': 'Other',
+    '99': 'Unknown'
+})
+
+ROADWAY_TYPE = MappingProxyType({
+    '1': 'Two-Way, Not Divided',
+    '2': 'Two-Way, Divided, Unprotected Median',
+    '3': 'Two-Way, Divided, Protected Median',
+    '4': 'One-Way',
+    '98': 'Other'
+})
+
+SURFACE_CONDITION = MappingProxyType({
+    '1': 'Dry',
+    '2': 'Wet',
+    '3': 'Standing Water',
+    '4': 'Snow',
+    '5': 'Slush',
+    '6': 'Ice',
+    '7': 'Sand, Mud, Dirt',
+    '98': 'Other',
+    '99': 'Unknown'
+})
+
+TRAFFIC_CONTROL = MappingProxyType({
+    '2': 'Inoperative',
+    '3': 'Officer',
+    '4': 'Flagman',
+    '5': 'Signal Light',
+    '6': 'Flashing Red Light',
+    '7': 'Flashing Yellow Light',
+    '8': 'Stop Sign',
+    '9': 'Yield Sign',
+    '10': 'Warning Sign',
+    '11': 'Center Stripe/Divider',
+    '12': 'No Passing Zone',
+    '13': 'RR Gate/Signal',
+    '15': 'Crosswalk',
+    '16': 'Bike Lane',
+    '17': 'Marked Lanes',
+    '18': 'Signal Light With Red Light Running Camera',
+    '96': 'None',
+    '98': 'Other'
+})
+
+# New code mappings for more detailed person description processing
+SEX_CODES = MappingProxyType({
+    '1': 'Male',
+    '2': 'Female',
+    '99': 'Unknown'
+})
+
+EJECT_CODES = MappingProxyType({
+    '1': 'Not Ejected',
+    '2': 'Partially Ejected',
+    '3': 'Totally Ejected',
+    '97': 'Not Applicable',
+    '99': 'Unknown'
+})
+
+RESTRAINT_CODES = MappingProxyType({
+    '1': 'Lap and Shoulder Belt',
+    '2': 'Lap Belt Only',
+    '3': 'Shoulder Belt Only',
+    '4': 'Child Restraint - Forward Facing',
+    '5': 'Child Restraint - Rear Facing',
+    '6': 'Booster Seat',
+    '7': 'None Used',
+    '97': 'Not Applicable',
+    '99': 'Unknown'
+})
+
+AIRBAG_CODES = MappingProxyType({
+    '1': 'Deployed',
+    '2': 'Not Deployed',
+    '3': 'Deployed, Unknown Effectiveness',
+    '4': 'Not Equipped',
+    '97': 'Not Applicable',
+    '99': 'Unknown'
+})
+
+HELMET_CODES = MappingProxyType({
+    '1': 'Helmet Used',
+    '2': 'No Helmet',
+    '97': 'Not Applicable',
+    '99': 'Unknown'
+})
+
+SOBRIETY_CODES = MappingProxyType({
+    'Y': 'Yes',
+    'N': 'No',
+    '99': 'Unknown'
+})
+
+SUBSTANCE_SPEC_CODES = MappingProxyType({
+    '96': 'No Test Performed',
+    '97': 'Not Applicable',
+    '99': 'Unknown'
+})
+
+SUBSTANCE_RESULT_CODES = MappingProxyType({
+    '1': 'Positive',
+    '2': 'Negative',
+    '96': 'No Test Performed',
+    '97': 'Not Applicable',
+    '99': 'Unknown'
+})
+
+# All code tables by category name, with their bound .get per category for lookups
+CODE_TABLES = MappingProxyType({
+    'ROADWAY_SYSTEM': ROADWAY_SYSTEM,
+    'ROADWAY_PART': ROADWAY_PART,
+    'DIRECTION': DIRECTION,
+    'STREET_SUFFIX': STREET_SUFFIX,
+    'UNIT_DESCRIPTION': UNIT_DESCRIPTION,
+    'VEHICLE_COLOR': VEHICLE_COLOR,
+    'BODY_STYLE': BODY_STYLE,
+    'AUTONOMOUS_UNIT': AUTONOMOUS_UNIT,
+    'AUTONOMOUS_LEVEL': AUTONOMOUS_LEVEL,
+    'PERSON_TYPE': PERSON_TYPE,
+    'INJURY_SEVERITY': INJURY_SEVERITY,
+    'ETHNICITY': ETHNICITY,
+    'FACTORS_AND_CONDITIONS': FACTORS_AND_CONDITIONS,
+    'WEATHER_CONDITION': WEATHER_CONDITION,
+    'LIGHT_CONDITION': LIGHT_CONDITION,
+    'ROADWAY_TYPE': ROADWAY_TYPE,
+    'SURFACE_CONDITION': SURFACE_CONDITION,
+    'TRAFFIC_CONTROL': TRAFFIC_CONTROL,
+    'SEX_CODES': SEX_CODES,
+    'EJECT_CODES': EJECT_CODES,
+    'RESTRAINT_CODES': RESTRAINT_CODES,
+    'AIRBAG_CODES': AIRBAG_CODES,
+    'HELMET_CODES': HELMET_CODES,
+    'SOBRIETY_CODES': SOBRIETY_CODES,
+    'SUBSTANCE_SPEC_CODES': SUBSTANCE_SPEC_CODES,
+    'SUBSTANCE_RESULT_CODES': SUBSTANCE_RESULT_CODES
+})
+_CODE_TABLE_GET = {name: table.get for name, table in CODE_TABLES.items()}
+
+# Location fields decoded by process_location_data: field type -> (decoded key, code lookup)
+_LOCATION_DECODERS = {
+    'rdwy_sys': ('roadway_system', ROADWAY_SYSTEM.get),
+    'rdwy_part': ('roadway_part', ROADWAY_PART.get),
+    'dir_of_traffic': ('direction', DIRECTION.get),
+    'street_suffix': ('street_suffix', STREET_SUFFIX.get)
+}
+
+# Environmental condition fields decoded by process_factors_and_conditions: field type -> code lookup
+_CONDITION_DECODERS = {
+    'weather_cond': WEATHER_CONDITION.get,
+    'light_cond': LIGHT_CONDITION.get,
+    'road_type': ROADWAY_TYPE.get,
+    'surface_cond': SURFACE_CONDITION.get,
+    'traffic_control': TRAFFIC_CONTROL.get
+}
+
+# Vehicle fields copied by process_vehicle_unit: field type -> code lookup, or None to keep the raw value
+_VEHICLE_INFO_DECODERS = {
+    'body_style': BODY_STYLE.get,
+    'veh_color': VEHICLE_COLOR.get,
+    'veh_year': None,
+    'veh_make': None,
+    'veh_model': None
+}
+
+# Structured person description fields, all empty, copied by extract_person_description
+_EMPTY_PERSON_FIELDS = MappingProxyType({
+    'injury_severity': '',
+    'age': '',
+    'ethnicity': '',
+    'sex': '',
+    'eject': '',
+    'restr': '',
+    'airbag': '',
+    'helmet': '',
+    'sol': '',
+    'alc_spec': '',
+    'alc_result': '',
+    'drug_spec': '',
+    'drug_result': '',
+    'drug_category': ''
+})
+
+@lru_cache(maxsize=4096)
+def _describe_code(category: str, code: str) -> str:
+    """Cached code lookup behind CrashReportDataDictionary.get_description"""
+    try:
+        lookup = _CODE_TABLE_GET[category]
+    except KeyError:
+        lookup = _CODE_TABLE_GET.get(category.upper())
+        if lookup is None:
+            return code
+    return lookup(str(code), code)
+
 class CrashReportDataDictionary:
     """Data dictionary for Texas Peace Officer's Crash Report codes and values"""
     
-    ROADWAY_SYSTEM = {
-        'IH': 'Interstate',
-        'US': 'US Highway',
-        'SH': 'State Highway',
-        'FM': 'Farm to Market',
-        'RR': 'Ranch Road',
-        'RM': 'Ranch to Market',
-        'BI': 'Business Interstate',
-        'BU': 'Business US',
-        'BS': 'Business State',
-        'BF': 'Business FM',
-        'SL': 'State Loop',
-        'TL': 'Toll Road',
-        'AL': 'Alternate',
-        'SP': 'Spur',
-        'CR': 'County Road',
-        'PR': 'Park Road',
-        'PV': 'Private Road',
-        'RC': 'Recreational Road',
-        'LR': 'Local Road/Street'
-    }
-    
-    ROADWAY_PART = {
-        '1': 'Main/Proper Lane',
-        '2': 'Service/Frontage Road',
-        '3': 'Entrance/On Ramp',
-        '4': 'Exit/Off Ramp',
-        '5': 'Connector/Flyover',
-        '98': 'Other'
-    }
-    
-    DIRECTION = {
-        'N': 'North',
-        'E': 'East',
-        'S': 'South',
-        'W': 'West',
-        'NE': 'Northeast',
-        'SE': 'Southeast',
-        'SW': 'Southwest',
-        'NW': 'Northwest'
-    }
-    
-    STREET_SUFFIX = {
-        'RD': 'Road',
-        'ST': 'Street',
-        'DR': 'Drive',
-        'LOOP': 'Loop',
-        'EXPY': 'Expressway',
-        'CT': 'Court',
-        'CIR': 'Circle',
-        'PL': 'Place',
-        'PARK': 'Park',
-        'CV': 'Cove',
-        'PATH': 'Path',
-        'TRC': 'Trace',
-        'PT': 'Point',
-        'AVE': 'Avenue',
-        'BLVD': 'Boulevard',
-        'PKWY': 'Parkway',
-        'LN': 'Lane',
-        'FWY': 'Freeway',
-        'HWY': 'Highway',
-        'WAY': 'Way',
-        'TRL': 'Trail'
-    }
-    
-    UNIT_DESCRIPTION = {
-        '1': 'Motor Vehicle',
-        '2': 'Train',
-        '3': 'Pedalcyclist',
-        '4': 'Pedestrian',
-        '5': 'Motorized Conveyance',
-        '6': 'Towed/Pushed/Trailer',
-        '7': 'Non-Contact',
-        '98': 'Other'
-    }
-    
-    VEHICLE_COLOR = {
-        'BGE': 'Beige',
-        'BLK': 'Black',
-        'BLU': 'Blue',
-        'BRZ': 'Bronze',
-        'BRO': 'Brown',
-        'CAM': 'Camouflage',
-        'CPR': 'Copper',
-        'GLD': 'Gold',
-        'GRY': 'Gray',
-        'GRN': 'Green',
-        'MAR': 'Maroon',
-        'MUL': 'Multicolored',
-        'ONG': 'Orange',
-        'PNK': 'Pink',
-        'PLE': 'Purple',
-        'RED': 'Red',
-        'SIL': 'Silver',
-        'TAN': 'Tan',
-        'TEA': 'Teal',
-        'TRQ': 'Turquoise',
-        'WHI': 'White',
-        'YEL': 'Yellow',
-        '98': 'Other',
-        '99': 'Unknown'
-    }
-    
-    BODY_STYLE = {
-        'P2': 'Passenger Car, 2-Door',
-        'P4': 'Passenger Car, 4-Door',
-        'PK': 'Pickup',
-        'AM': 'Ambulance',
-        'BU': 'Bus',
-        'SB': 'Yellow School Bus',
-        'FE': 'Farm Equipment',
-        'FT': 'Fire Truck',
-        'MC': 'Motorcycle',
-        'PC': 'Police Car/Truck',
-        'PM': 'Police Motorcycle',
-        'TL': 'Trailer',
-        'TR': 'Truck',
-        'TT': 'Truck Tractor',
-        'VN': 'Van',
-        'EV': 'Neighborhood Vehicle',
-        'SV': 'Sport Utility Vehicle',
-        '98': 'Other',
-        '99': 'Unknown'
-    }
-    
-    AUTONOMOUS_UNIT = {
-        '1': 'Yes',
-        '2': 'No',
-        '99': 'Unknown'
-    }
-    
-    AUTONOMOUS_LEVEL = {
-        '0': 'No Automation',
-        '1': 'Driver Assistance',
-        '2': 'Partial Automation',
-        '3': 'Conditional Automation',
-        '4': 'High Automation',
-        '5': 'Full Automation',
-        '6': 'Automation Level Unknown',
-        '99': 'Unknown'
-    }
-    
-    PERSON_TYPE = {
-        '1': 'Driver',
-        '2': 'Passenger/Occupant',
-        '3': 'Pedalcyclist',
-        '4': 'Pedestrian',
-        '5': 'Driver of Motorcycle Type Vehicle',
-        '6': 'Passenger/Occupant on Motorcycle Type Vehicle',
-        '95': 'Autonomous',
-        '98': 'Other',
-        '99': 'Unknown'
-    }
-    
-    INJURY_SEVERITY = {
-        'A': 'Suspected Serious Injury',
-        'B': 'Suspected Minor Injury',
-        'C': 'Possible Injury',
-        'K': 'Fatal Injury',
-        'N': 'Not Injured',
-        '95': 'Autonomous',
-        '99': 'Unknown'
-    }
-    
-    ETHNICITY = {
-        'W': 'White',
-        'B': 'Black',
-        'H': 'Hispanic',
-        'A': 'Asian',
-        'I': 'American Indian/Alaskan Native',
-        '95': 'Autonomous',
-        '98': 'Other',
-        '99': 'Unknown'
-    }
-    
-    FACTORS_AND_CONDITIONS = {
-        '1': 'Animal on Road - Domestic',
-        '2': 'Animal on Road - Wild',
-        '3': 'Backed without Safety',
-        '4': 'Changed Lane when Unsafe',
-        '14': 'Disabled in Traffic Lane',
-        '15': 'Disregard Stop and Go Signal',
-        '16': 'Disregard Stop Sign or Light',
-        '19': 'Distraction in Vehicle',
-        '20': 'Driver Inattention',
-        '22': 'Failed to Control Speed',
-        '23': 'Failed to Drive in Single Lane',
-        '40': 'Fatigued or Asleep',
-        '41': 'Faulty Evasive Action',
-        '42': 'Fire in Vehicle',
-        '43': 'Fleeing or Evading Police',
-        '44': 'Followed Too Closely',
-        '45': 'Had Been Drinking',
-        '67': 'Intoxicated - Alcohol',
-        '68': 'Intoxicated - Drug',
-        '73': 'Road Rage',
-        '74': 'Cell/Mobile Device Use - Talking',
-        '75': 'Cell/Mobile Device Use - Texting',
-        '76': 'Cell/Mobile Device Use - Other',
-        '77': 'Cell/Mobile Device Use - Unknown'
-    }
-    
-    WEATHER_CONDITION = {
-        '1': 'Clear',
-        '2': 'Cloudy',
-        '3': 'Rain',
-        '4': 'Sleet/Hail',
-        '5': 'Snow',
-        '6': 'Fog',
-        '7': 'Blowing Sand/Snow',
-        '8': 'Severe Crosswinds',
-        '98': 'Other',
-        '99': 'Unknown'
-    }
-    
-    LIGHT_CONDITION = {
-        '1': 'Daylight',
-        '2': 'Dark, Not Lighted',
-        '3': 'Dark, Lighted',
-        '4': 'Dark, Unknown Lighting',
-        '5': 'Dawn',
-        '6': 'Dusk',
-        '98': 'Other',
-        '99': 'Unknown'
-    }
-    
-    ROADWAY_TYPE = {
-        '1': 'Two-Way, Not Divided',
-        '2': 'Two-Way, Divided, Unprotected Median',
-        '3': 'Two-Way, Divided, Protected Median',
-        '4': 'One-Way',
-        '98': 'Other'
-    }
-    
-    SURFACE_CONDITION = {
-        '1': 'Dry',
-        '2': 'Wet',
-        '3': 'Standing Water',
-        '4': 'Snow',
-        '5': 'Slush',
-        '6': 'Ice',
-        '7': 'Sand, Mud, Dirt',
-        '98': 'Other',
-        '99': 'Unknown'
-    }
-    
-    TRAFFIC_CONTROL = {
-        '2': 'Inoperative',
-        '3': 'Officer',
-        '4': 'Flagman',
-        '5': 'Signal Light',
-        '6': 'Flashing Red Light',
-        '7': 'Flashing Yellow Light',
-        '8': 'Stop Sign',
-        '9': 'Yield Sign',
-        '10': 'Warning Sign',
-        '11': 'Center Stripe/Divider',
-        '12': 'No Passing Zone',
-        '13': 'RR Gate/Signal',
-        '15': 'Crosswalk',
-        '16': 'Bike Lane',
-        '17': 'Marked Lanes',
-        '18': 'Signal Light With Red Light Running Camera',
-        '96': 'None',
-        '98': 'Other'
-    }
-
-    # New code mappings for more detailed person description processing
-    SEX_CODES = {
-        '1': 'Male',
-        '2': 'Female',
-        '99': 'Unknown'
-    }
-    
-    EJECT_CODES = {
-        '1': 'Not Ejected',
-        '2': 'Partially Ejected',
-        '3': 'Totally Ejected',
-        '97': 'Not Applicable',
-        '99': 'Unknown'
-    }
-    
-    RESTRAINT_CODES = {
-        '1': 'Lap and Shoulder Belt',
-        '2': 'Lap Belt Only',
-        '3': 'Shoulder Belt Only',
-        '4': 'Child Restraint - Forward Facing',
-        '5': 'Child Restraint - Rear Facing',
-        '6': 'Booster Seat',
-        '7': 'None Used',
-        '97': 'Not Applicable',
-        '99': 'Unknown'
-    }
-    
-    AIRBAG_CODES = {
-        '1': 'Deployed',
-        '2': 'Not Deployed',
-        '3': 'Deployed, Unknown Effectiveness',
-        '4': 'Not Equipped',
-        '97': 'Not Applicable',
-        '99': 'Unknown'
-    }
-    
-    HELMET_CODES = {
-        '1': 'Helmet Used',
-        '2': 'No Helmet',
-        '97': 'Not Applicable',
-        '99': 'Unknown'
-    }
-    
-    SOBRIETY_CODES = {
-        'Y': 'Yes',
-        'N': 'No',
-        '99': 'Unknown'
-    }
-    
-    SUBSTANCE_SPEC_CODES = {
-        '96': 'No Test Performed',
-        '97': 'Not Applicable',
-        '99': 'Unknown'
-    }
-    
-    SUBSTANCE_RESULT_CODES = {
-        '1': 'Positive',
-        '2': 'Negative',
-        '96': 'No Test Performed',
-        '97': 'Not Applicable',
-        '99': 'Unknown'
-    }
+    ROADWAY_SYSTEM = ROADWAY_SYSTEM
+    ROADWAY_PART = ROADWAY_PART
+    DIRECTION = DIRECTION
+    STREET_SUFFIX = STREET_SUFFIX
+    UNIT_DESCRIPTION = UNIT_DESCRIPTION
+    VEHICLE_COLOR = VEHICLE_COLOR
+    BODY_STYLE = BODY_STYLE
+    AUTONOMOUS_UNIT = AUTONOMOUS_UNIT
+    AUTONOMOUS_LEVEL = AUTONOMOUS_LEVEL
+    PERSON_TYPE = PERSON_TYPE
+    INJURY_SEVERITY = INJURY_SEVERITY
+    ETHNICITY = ETHNICITY
+    FACTORS_AND_CONDITIONS = FACTORS_AND_CONDITIONS
+    WEATHER_CONDITION = WEATHER_CONDITION
+    LIGHT_CONDITION = LIGHT_CONDITION
+    ROADWAY_TYPE = ROADWAY_TYPE
+    SURFACE_CONDITION = SURFACE_CONDITION
+    TRAFFIC_CONTROL = TRAFFIC_CONTROL
+    SEX_CODES = SEX_CODES
+    EJECT_CODES = EJECT_CODES
+    RESTRAINT_CODES = RESTRAINT_CODES
+    AIRBAG_CODES = AIRBAG_CODES
+    HELMET_CODES = HELMET_CODES
+    SOBRIETY_CODES = SOBRIETY_CODES
+    SUBSTANCE_SPEC_CODES = SUBSTANCE_SPEC_CODES
+    SUBSTANCE_RESULT_CODES = SUBSTANCE_RESULT_CODES
 
     @classmethod
     def get_description(cls, category: str, code: str) -> str:
@@ -1561,11 +1881,7 @@ class CrashReportDataDictionary:
         Returns:
             The description for the code, or the original code if not found
         """
-        try:
-            category_dict = getattr(cls, category.upper())
-            return category_dict.get(str(code), code)
-        except AttributeError:
-            return code
+        return _describe_code(category, code)
 
     @classmethod
     def decode_multiple(cls, category: str, codes: str) -> List[str]:
@@ -1598,11 +1914,10 @@ class CrashReportDataDictionary:
         Returns:
             True if the code is valid, False otherwise
         """
-        try:
-            category_dict = getattr(cls, category.upper())
-            return str(code) in category_dict
-        except AttributeError:
+        category_dict = CODE_TABLES.get(category) or CODE_TABLES.get(category.upper())
+        if category_dict is None:
             return False
+        return str(code) in category_dict
 
 class CrashReportDataProcessor:
     """Utility class for processing and transforming crash report data"""
@@ -1627,37 +1942,33 @@ class CrashReportDataProcessor:
         address_components = {}
         decoded_components = {}
         
-        for field_type, entries in location_data.get("child_fields", {}).items():
+        child_fields = location_data.get("child_fields") or {}
+        for field_type, entries in child_fields.items():
             if not entries:
                 continue
                 
             value = entries[0].get('value', '').strip()
             
             # Decode values based on field type
-            if field_type == 'rdwy_sys':
-                decoded_value = self.data_dict.get_description('ROADWAY_SYSTEM', value)
-                decoded_components['roadway_system'] = decoded_value
-            elif field_type == 'rdwy_part':
-                decoded_value = self.data_dict.get_description('ROADWAY_PART', value)
-                decoded_components['roadway_part'] = decoded_value
-            elif field_type == 'dir_of_traffic':
-                decoded_value = self.data_dict.get_description('DIRECTION', value)
-                decoded_components['direction'] = decoded_value
-            elif field_type == 'street_suffix':
-                decoded_value = self.data_dict.get_description('STREET_SUFFIX', value)
-                decoded_components['street_suffix'] = decoded_value
+            decoder = _LOCATION_DECODERS.get(field_type)
+            if decoder:
+                decoded_key, lookup = decoder
+                decoded_components[decoded_key] = lookup(value, value)
                 
             # Store original values for address building
-            if field_type in ['block_num', 'street_prefix', 'street_name', 'street_suffix']:
+            if field_type in {'block_num', 'street_prefix', 'street_name', 'street_suffix'}:
                 address_components[field_type] = value
         
         # Build structured address
-        address = " ".join(filter(None, [
-            address_components.get('block_num', ''),
-            address_components.get('street_prefix', ''),
-            address_components.get('street_name', ''),
-            address_components.get('street_suffix', '')
-        ]))
+        get_component = address_components.get
+        address = " ".join([
+            part for part in (
+                get_component('block_num'),
+                get_component('street_prefix'),
+                get_component('street_name'),
+                get_component('street_suffix')
+            ) if part
+        ])
         
         result = {
             'structured_address': address,
@@ -1678,63 +1989,48 @@ class CrashReportDataProcessor:
         Returns:
             Dictionary of decoded person information with structured details
         """
-        # Initialize structured fields
-        fields = {
-            'injury_severity': '',
-            'age': '',
-            'ethnicity': '',
-            'sex': '',
-            'eject': '',
-            'restr': '',
-            'airbag': '',
-            'helmet': '',
-            'sol': '',
-            'alc_spec': '',
-            'alc_result': '',
-            'drug_spec': '',
-            'drug_result': '',
-            'drug_category': ''
-        }
-        
         if not description:
-            return fields
+            return dict(_EMPTY_PERSON_FIELDS)
+        
+        # Clean and split description by lines; codes are interned so the code
+        # table lookups below compare by identity
+        parts = [sys.intern(p) for p in (line.strip() for line in description.splitlines()) if p]
+        
+        # Ensure we have enough parts
+        if len(parts) < 8:
+            return dict(_EMPTY_PERSON_FIELDS)
         
-        # Clean and split description by lines
-        parts = [p.strip() for p in description.split('\n') if p.strip()]
+        # Initialize structured fields
+        fields = dict(_EMPTY_PERSON_FIELDS)
         
         try:
-            # Ensure we have enough parts
-            if len(parts) < 8:
-                return fields
-            
             # Parse fields in order
             fields['injury_severity'] = self.data_dict.get_description('INJURY_SEVERITY', parts[0])
             
-            # Age (find first numeric value)
-            age_parts = [p for p in parts if p.isdigit()]
-            if age_parts:
-                fields['age'] = age_parts[0]
-            
-            # Ethnicity 
-            ethnicity_parts = [p for p in parts if p in self.data_dict.ETHNICITY]
-            if ethnicity_parts:
-                fields['ethnicity'] = self.data_dict.get_description('ETHNICITY', ethnicity_parts[0])
-            
-            # Sex
-            sex_parts = [p for p in parts if p in self.data_dict.SEX_CODES]
-            if sex_parts:
-                fields['sex'] = self.data_dict.SEX_CODES.get(sex_parts[0], sex_parts[0])
-            
-            # Find parts for other fields
-            remaining_parts = [p for p in parts if p not in [
-                fields['injury_severity'], 
-                fields.get('age', ''), 
-                fields.get('ethnicity', ''), 
-                fields.get('sex', '')
-            ]]
-            
-            # Ensure at least 5 more parts are available
-            if len(remaining_parts) >= 5:
+            # Classify the remaining parts in one pass: the first numeric part is the
+            # age, then the first ethnicity and sex codes; everything else keeps its
+            # order for the positional fields below
+            age = ethnicity_code = sex_code = None
+            remaining_parts = []
+            for part in parts[1:]:
+                if age is None and part.isdigit():
+                    age = part
+                elif ethnicity_code is None and part in self.data_dict.ETHNICITY:
+                    ethnicity_code = part
+                elif sex_code is None and part in self.data_dict.SEX_CODES:
+                    sex_code = part
+                else:
+                    remaining_parts.append(part)
+            
+            if age is not None:
+                fields['age'] = age
+            if ethnicity_code is not None:
+                fields['ethnicity'] = self.data_dict.get_description('ETHNICITY', ethnicity_code)
+            if sex_code is not None:
+                fields['sex'] = self.data_dict.SEX_CODES.get(sex_code, sex_code)
+            
+            # Ensure the four restraint-related parts are available
+            if len(remaining_parts) >= 4:
                 # Eject
                 fields['eject'] = self.data_dict.EJECT_CODES.get(remaining_parts[0], remaining_parts[0])
                 
@@ -1748,7 +2044,7 @@ class CrashReportDataProcessor:
                 fields['helmet'] = self.data_dict.HELMET_CODES.get(remaining_parts[3], remaining_parts[3])
             
             # Optional subsequent fields
-            if len(remaining_parts) >= 6:
+            if len(remaining_parts) >= 5:
                 # Sobriety of Last Drink
                 fields['sol'] = self.data_dict.SOBRIETY_CODES.get(remaining_parts[4], remaining_parts[4])
             
@@ -1766,11 +2062,33 @@ class CrashReportDataProcessor:
                     fields['drug_result'] = self.data_dict.SUBSTANCE_RESULT_CODES.get(remaining_parts[8], remaining_parts[8])
                     fields['drug_category'] = self.data_dict.SUBSTANCE_SPEC_CODES.get(remaining_parts[9], remaining_parts[9])
             
-        except Exception as e:
-            print(f"Error processing person description: {e}")
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning("Error processing person description: %s", e)
         
         return fields
 
+    def extract_person_descriptions_batch(self, descriptions: List[str]) -> List[Dict[str, str]]:
+        """
+        Extract and decode a batch of person descriptions
+        
+        Identical descriptions, which repeat heavily across crash reports, are
+        parsed once; each occurrence gets its own copy of the decoded fields.
+        
+        Args:
+            descriptions: Raw person description strings
+            
+        Returns:
+            List of decoded person information, in input order
+        """
+        parsed = {}
+        results = []
+        for description in descriptions:
+            fields = parsed.get(description)
+            if fields is None:
+                fields = parsed[description] = self.extract_person_description(description)
+            results.append(dict(fields))
+        return results
+
     def process_vehicle_unit(self, vehicle_data: Dict) -> Dict:
         """
         Process vehicle unit data with decoded values
@@ -1789,37 +2107,36 @@ class CrashReportDataProcessor:
         }
         
         try:
+            child_fields = vehicle_data.get('child_fields') or {}
+            
             # Process unit description
-            if 'unit_desc' in vehicle_data.get('child_fields', {}):
-                value = vehicle_data['child_fields']['unit_desc'][0].get('value', '')
+            if 'unit_desc' in child_fields:
+                value = child_fields['unit_desc'][0].get('value', '')
                 processed_data['unit_info']['type'] = self.data_dict.get_description('UNIT_DESCRIPTION', value)
             
             # Process vehicle information
-            for field in ['body_style', 'veh_color', 'veh_year', 'veh_make', 'veh_model']:
-                if field in vehicle_data.get('child_fields', {}):
-                    value = vehicle_data['child_fields'][field][0].get('value', '')
-                    if field == 'body_style':
-                        processed_data['vehicle_info'][field] = self.data_dict.get_description('BODY_STYLE', value)
-                    elif field == 'veh_color':
-                        processed_data['vehicle_info'][field] = self.data_dict.get_description('VEHICLE_COLOR', value)
-                    else:
-                        processed_data['vehicle_info'][field] = value
+            vehicle_info = processed_data['vehicle_info']
+            for field, lookup in _VEHICLE_INFO_DECODERS.items():
+                entries = child_fields.get(field)
+                if entries:
+                    value = entries[0].get('value', '')
+                    vehicle_info[field] = lookup(value, value) if lookup else value
             
             # Process autonomous information
-            if 'autonomous_unit' in vehicle_data.get('child_fields', {}):
-                value = vehicle_data['child_fields']['autonomous_unit'][0].get('value', '')
+            if 'autonomous_unit' in child_fields:
+                value = child_fields['autonomous_unit'][0].get('value', '')
                 processed_data['vehicle_info']['autonomous'] = self.data_dict.get_description('AUTONOMOUS_UNIT', value)
             
-            if 'autonomous_level_engaged' in vehicle_data.get('child_fields', {}):
-                value = vehicle_data['child_fields']['autonomous_level_engaged'][0].get('value', '')
+            if 'autonomous_level_engaged' in child_fields:
+                value = child_fields['autonomous_level_engaged'][0].get('value', '')
                 processed_data['vehicle_info']['autonomous_level'] = self.data_dict.get_description('AUTONOMOUS_LEVEL', value)
             
             # Process person information
             person_data = self.process_person_data(vehicle_data)
             processed_data.update(person_data)
             
-        except Exception as e:
-            print(f"Error processing vehicle unit: {e}")
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning("Error processing vehicle unit: %s", e)
             
         return processed_data
 
@@ -1845,9 +2162,10 @@ class CrashReportDataProcessor:
                     if entity['type'] == 'person_name':
                         person_info['name'] = entity['value']
                     elif entity['type'] == 'person_type':
-                        person_info['type'] = self.data_dict.get_description('PERSON_TYPE', entity['value'])
+                        type_code = sys.intern(entity['value'])
+                        person_info['type'] = self.data_dict.get_description('PERSON_TYPE', type_code)
                         # Store original code for sorting
-                        person_info['type_code'] = entity['value']
+                        person_info['type_code'] = type_code
                     elif entity['type'] == 'person_description':
                         person_info['details'] = self.extract_person_description(entity['value'])
                 
@@ -1865,8 +2183,8 @@ class CrashReportDataProcessor:
                 x.get('passenger_num', 0)
             ))
             
-        except Exception as e:
-            print(f"Error processing person data: {e}")
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning("Error processing person data: %s", e)
             
         return processed_data
 
@@ -1911,11 +2229,8 @@ class CrashReportDataProcessor:
         if not narrative:
             return ""
             
-        # Remove <cr> tags
-        cleaned = narrative.replace('<cr>', ' ')
-        
-        # Remove any other HTML-like tags
-        cleaned = re.sub(r'<[^>]+>', ' ', cleaned)
+        # Remove <cr> and any other HTML-like tags
+        cleaned = _TAG_RE.sub(' ', narrative)
         
         # Normalize whitespace
         cleaned = ' '.join(cleaned.split())
@@ -1939,29 +2254,25 @@ class CrashReportDataProcessor:
         }
         
         try:
+            child_fields = factors_data.get('child_fields') or {}
+            
             # Process contributing factors
-            if 'contributing_factors' in factors_data.get('child_fields', {}):
-                for factor in factors_data['child_fields']['contributing_factors']:
+            if 'contributing_factors' in child_fields:
+                for factor in child_fields['contributing_factors']:
                     value = factor.get('value', '')
                     decoded = self.data_dict.get_description('FACTORS_AND_CONDITIONS', value)
                     processed_data['contributing_factors'].append(decoded)
             
             # Process environmental conditions
-            condition_mappings = {
-                'weather_cond': 'WEATHER_CONDITION',
-                'light_cond': 'LIGHT_CONDITION',
-                'road_type': 'ROADWAY_TYPE',
-                'surface_cond': 'SURFACE_CONDITION',
-                'traffic_control': 'TRAFFIC_CONTROL'
-            }
-            
-            for field, category in condition_mappings.items():
-                if field in factors_data.get('child_fields', {}):
-                    value = factors_data['child_fields'][field][0].get('value', '')
-                    processed_data['environmental_conditions'][field] = self.data_dict.get_description(category, value)
+            environmental_conditions = processed_data['environmental_conditions']
+            for field, lookup in _CONDITION_DECODERS.items():
+                entries = child_fields.get(field)
+                if entries:
+                    value = entries[0].get('value', '')
+                    environmental_conditions[field] = lookup(value, value)
             
-        except Exception as e:
-            print(f"Error processing factors and conditions: {e}")
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning("Error processing factors and conditions: %s", e)
             
         return processed_data
 
@@ -1976,10 +2287,11 @@ class CrashReportDataProcessor:
             Sorted list of vehicle data
         """
         def get_unit_num(vehicle):
-            try:
-                return int(vehicle.get('child_fields', {}).get('unit_num', [{}])[0].get('value', '0'))
-            except (ValueError, IndexError):
-                return 0
+            # Checked explicitly rather than by catching exceptions; sorted() calls
+            # this exactly once per vehicle
+            entries = (vehicle.get('child_fields') or {}).get('unit_num')
+            value = str(entries[0].get('value', '0')).strip() if entries else ''
+            return int(value) if value.isdecimal() else 0
                 
         return sorted(data, key=get_unit_num)
 
@@ -1987,7 +2299,7 @@ class CheckboxProcessor:
     """Process checkbox values from JSON extraction"""
     
     # Specific fields to process as checkboxes
-    CHECKBOX_FIELDS = {
+    CHECKBOX_FIELDS = frozenset({
         'outside_city_limit',
         'crash_damage_1000',
         'const_zone',
@@ -1998,7 +2310,14 @@ class CheckboxProcessor:
         'proof_of_fin_resp',
         'investigation_complete',
         'owner_lesse'
-    }
+    })
+    
+    # Matches any field type containing a checkbox field name or 'tick_box'
+    # (which covers exact matches too), in a single scan; longer names are
+    # tried first so the most specific alternative matches
+    _CHECKBOX_FIELD_RE = re.compile('|'.join(
+        map(re.escape, sorted(CHECKBOX_FIELDS | {'tick_box'}, key=lambda name: (-len(name), name)))
+    ))
     
     @staticmethod
     def parse_checkbox_value(value: str) -> Union[bool, str]:
@@ -2014,8 +2333,14 @@ class CheckboxProcessor:
         if not value:
             return False
         
-        # Clean and normalize the value
-        value = value.replace('\n', ' ').strip()
+        # Clean the value; split() below already treats newlines as whitespace
+        value = value.strip()
+        
+        # Fast path for the common lone checkbox symbol
+        if value == '☑':
+            return True
+        if value == '☐':
+            return False
         
         # Direct boolean check based on checkbox symbols
         if value.count('☑') == 1 and value.count('☐') == 0:
@@ -2030,10 +2355,10 @@ class CheckboxProcessor:
         
         for part in parts:
             # Detect selected option
-            if '☑' in part or (is_checkbox and part in ['Yes', 'True']):
+            if '☑' in part or (is_checkbox and part in {'Yes', 'True'}):
                 selected_options.append(part)
             # Handle Yes/No scenarios
-            elif part in ['Yes', 'No']:
+            elif part in {'Yes', 'No'}:
                 if '☑' in value and part == 'Yes':
                     return True
                 elif '☑' in value and part == 'No':
@@ -2042,7 +2367,7 @@ class CheckboxProcessor:
         # Final processing of selected options
         if selected_options:
             # Remove checkbox symbols
-            cleaned_options = [opt for opt in selected_options if opt not in ['☑', '☐']]
+            cleaned_options = [opt for opt in selected_options if opt not in {'☑', '☐'}]
             
             if not cleaned_options:
                 return True  # Checkbox is checked
@@ -2080,11 +2405,7 @@ class CheckboxProcessor:
         field_type = result['type'].lower()
         
         # Determine if field should be processed as a checkbox
-        is_checkbox_field = (
-            field_type in CheckboxProcessor.CHECKBOX_FIELDS or 
-            'tick_box' in field_type or 
-            any(cb_field in field_type for cb_field in CheckboxProcessor.CHECKBOX_FIELDS)
-        )
+        is_checkbox_field = CheckboxProcessor._CHECKBOX_FIELD_RE.search(field_type) is not None
         
         if is_checkbox_field:
             # Process as checkbox
@@ -2115,14 +2436,23 @@ class CheckboxProcessor:
         Returns:
             Processed JSON data
         """
+        # Leaf dicts have nothing to transform; hand them back as-is. Containers
+        # from parsed JSON are plain dicts and lists, so exact type checks suffice
+        if not any(
+            type(value) in _JSON_CONTAINER_TYPES or key == 'child_fields'
+            for key, value in json_data.items()
+        ):
+            return json_data
+        
         result = {}
         
         for key, value in json_data.items():
-            if isinstance(value, dict):
+            value_type = type(value)
+            if value_type is dict:
                 result[key] = CheckboxProcessor.process_nested_json(value)
-            elif isinstance(value, list):
+            elif value_type is list:
                 result[key] = [
-                    CheckboxProcessor.process_nested_json(item) if isinstance(item, dict)
+                    CheckboxProcessor.process_nested_json(item) if type(item) is dict
                     else item
                     for item in value
                 ]
@@ -2136,6 +2466,16 @@ class CheckboxProcessor:
                 
         return result
 
+# Storage client shared by module-level GCS helpers, created on first use
+_STORAGE_CLIENT = None
+
+def _get_storage_client() -> storage.Client:
+    """Return the shared storage client, creating it on first use"""
+    global _STORAGE_CLIENT
+    if _STORAGE_CLIENT is None:
+        _STORAGE_CLIENT = storage.Client()
+    return _STORAGE_CLIENT
+
 def download_file_from_gcs(bucket_name: str, source_blob_name: str) -> bytes:
     """
     Download a file from Google Cloud Storage
@@ -2150,15 +2490,32 @@ def download_file_from_gcs(bucket_name: str, source_blob_name: str) -> bytes:
     # Remove 'gs://' if present
     bucket_name = bucket_name.replace('gs://', '')
     
-    # Create storage client
-    storage_client = storage.Client()
-    
-    # Get the bucket and blob
-    bucket = storage_client.bucket(bucket_name)
+    # Get the bucket and blob through the shared storage client
+    bucket = _get_storage_client().bucket(bucket_name)
     blob = bucket.blob(source_blob_name)
     
-    # Download the file
-    return blob.download_as_bytes()
+    # Stream the object into memory as stored, skipping decompressive transcoding;
+    # the CRC32C check stays on and uses the google-crc32c C extension
+    buffer = io.BytesIO()
+    blob.download_to_file(buffer, raw_download=True)
+    return buffer.getvalue()
+
+@st.cache_resource
+def get_document_processor(project_id: str, location: str) -> DocumentAIProcessor:
+    """
+    Return a DocumentAIProcessor shared across Streamlit reruns and sessions
+    
+    Streamlit reruns the whole script on every interaction; caching the processor
+    keeps its Document AI and storage clients (and their connections) alive.
+    
+    Args:
+        project_id (str): Google Cloud project ID
+        location (str): Document AI processor location
+    
+    Returns:
+        DocumentAIProcessor: Cached processor instance
+    """
+    return DocumentAIProcessor(project_id=project_id, location=location)
 
 def main():
     st.title("Document AI PDF Extraction")
@@ -2183,7 +2540,7 @@ def main():
                 st.session_state.processing_complete = False
                 
                 # Initialize processor
-                processor = DocumentAIProcessor(
+                processor = get_document_processor(
                     project_id=PROJECT_CONFIG['project_id'],
                     location=PROJECT_CONFIG['location']
                 )
@@ -2192,12 +2549,14 @@ def main():
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 original_filename = uploaded_file.name
                 base_name, ext = os.path.splitext(original_filename)
-                input_filename = f"{base_name}_{timestamp}{ext}"
                 output_filename = f"{base_name}_{timestamp}"
                 
-                # Save uploaded file
-                with open(input_filename, "wb") as f:
-                    f.write(uploaded_file.getvalue())
+                # Stream the upload into a private temporary file, so concurrent
+                # sessions never share a path and the bytes are not copied first
+                with tempfile.NamedTemporaryFile(delete=False, suffix=ext or '.pdf', buffering=1 << 20) as temp_file:
+                    uploaded_file.seek(0)
+                    shutil.copyfileobj(uploaded_file, temp_file, length=1 << 20)
+                    input_filename = temp_file.name
                 
                 # Process document
                 st.session_state.document_result = processor.process_document_page_by_page(
@@ -2205,42 +2564,33 @@ def main():
                     processor_id=PROJECT_CONFIG['processor_id']
                 )
                 
-                # Save JSON to GCS first
-                processor.save_to_gcs_as_json(
+                # Save JSON and Excel to GCS concurrently
+                _, excel_gcs_uri = processor.save_results_to_gcs(
                     bucket_name=PROJECT_CONFIG['output_bucket'],
                     data=st.session_state.document_result,
                     filename=output_filename,
                     prefix="output"
                 )
                 
-                # Then save Excel
-                excel_gcs_uri = processor.save_excel_to_gcs(
-                    bucket_name=PROJECT_CONFIG['output_bucket'],
-                    data=st.session_state.document_result,
-                    filename=f"{output_filename}.xlsx",
-                    prefix="output"
-                )
-                
                 st.session_state.excel_output_filename = f"output/{output_filename}.xlsx"
                 st.session_state.excel_gcs_uri = excel_gcs_uri
                 st.session_state.processing_complete = True
                 
                 st.success("Document processed successfully!")
-                processor.display_document_results(st.session_state.document_result)
                 
             except Exception as e:
                 st.error(f"Error processing document: {str(e)}")
                 st.session_state.processing_complete = False
             finally:
-                # Clean up
-                if os.path.exists(input_filename):
-                    os.remove(input_filename)
+                # Clean up the temporary file
+                if 'input_filename' in locals() and os.path.exists(input_filename):
+                    os.unlink(input_filename)
         else:
             st.warning("Please upload a PDF document")
     
     # Only show results once
     if st.session_state.document_result is not None:
-        processor = DocumentAIProcessor(
+        processor = get_document_processor(
             project_id=PROJECT_CONFIG['project_id'],
             location=PROJECT_CONFIG['location']
         )
@@ -1,9 +1,13 @@
+from __future__ import annotations
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import os
+import re
 import shutil
-import PyPDF2
+import pikepdf
 import io
 import requests
 import google.auth.transport.requests
@@ -14,9 +18,16 @@ import google_auth_oauthlib.flow
 import webbrowser
 import time
 import tempfile
+import threading
+import logging
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, as_completed, wait
 from google.cloud import storage, documentai
+from google.cloud.storage import transfer_manager
+from google.api_core import exceptions as api_exceptions
+from google.api_core import retry as api_retry
 from google.api_core.client_options import ClientOptions
-from typing import Dict, Any, Optional, List, Union, Union
+from typing import TYPE_CHECKING
 from PIL import Image
 from pdf2image import convert_from_path
 from google.oauth2 import id_token
@@ -25,8 +36,21 @@ from datetime import datetime
 from dictionary import Dictionary as dictionary
 from geocoding import Geocoding as geocoding
 
+if TYPE_CHECKING:
+    from typing import Dict, Any, Iterator, Optional, List, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
 load_dotenv()
 
+# Configure logging once at import
+logging.basicConfig(level=logging.INFO, 
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 # Predefined Configuration
 PROJECT_CONFIG = {
     "project_id": "neon-camp-449123-j1",
@@ -36,128 +60,260 @@ PROJECT_CONFIG = {
     "output_bucket": "doc-ai-extraction-dev"
 }
 
+# Upload chunk size for GCS blobs (must be a multiple of 256 KiB)
+GCS_UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Payloads up to this size go up in a single multipart request
+GCS_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+def _upload_chunk_size(size: int) -> Optional[int]:
+    """Chunk size for an upload of the given size: none (single request) for small payloads"""
+    return GCS_UPLOAD_CHUNK_SIZE if size > GCS_MULTIPART_THRESHOLD else None
+
+# Columns of the per-entity tables shown in the results view
+RESULT_TABLE_COLUMNS = ("Child Type", "Level", "Type", "Value", "Confidence")
+
+# Documents with more pages than this render one selected page at a time
+RESULTS_PAGE_PICKER_THRESHOLD = 10
+
+# Lowercases an entity type and replaces spaces with underscores in one pass
+_TYPE_NORMALIZATION = str.maketrans(
+    " ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "_abcdefghijklmnopqrstuvwxyz"
+)
+
+# Retry transient Document AI failures (quota throttling, unavailability, timeouts)
+# with exponential backoff and jitter instead of failing the whole document
+DOCUMENT_AI_RETRY = api_retry.Retry(
+    predicate=api_retry.if_exception_type(
+        api_exceptions.ResourceExhausted,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.DeadlineExceeded
+    ),
+    initial=1.0,
+    maximum=16.0,
+    multiplier=2.0,
+    deadline=120.0
+)
+
+# Largest PDF (in pages) the synchronous process_document call accepts
+SYNC_PROCESS_MAX_PAGES = 15
+
+# Vectorized str length, used to size Excel columns
+_str_len = np.vectorize(len, otypes=[np.int64])
+
+def _lowercase_field_hierarchy(fields):
+    """Return a copy of a field hierarchy with every key and list entry as a lowercase string"""
+    if isinstance(fields, list):
+        return [str(f).lower() for f in fields]
+    if isinstance(fields, dict):
+        return {str(field).lower(): _lowercase_field_hierarchy(subfields) for field, subfields in fields.items()}
+    return fields
+
+@lru_cache(maxsize=64)
+def _resolve_blob_path(bucket_name: str, filename: str, prefix: str = '') -> Tuple[str, str]:
+    """
+    Split a bucket name that may carry gs:// and nested folders into the bare
+    bucket name and the full blob path of a file
+    
+    Args:
+        bucket_name (str): Name of the GCS bucket, optionally with gs:// and a folder path
+        filename (str): Name of the file in the bucket
+        prefix (str, optional): Prefix/folder path in the bucket
+    
+    Returns:
+        Tuple[str, str]: Bucket name and blob path
+    """
+    # Remove 'gs://' if present and split bucket path to handle nested paths
+    bucket_parts = bucket_name.replace('gs://', '').split('/')
+    
+    # Add any additional path components to the prefix
+    additional_path = '/'.join(bucket_parts[1:]).strip('/')
+    if additional_path:
+        prefix = f"{additional_path}/{prefix}" if prefix else additional_path
+    
+    # Construct full blob path with prefix, removing any double slashes
+    full_blob_path = f"{prefix}/{filename}" if prefix else filename
+    return bucket_parts[0], full_blob_path.replace('//', '/')
+
 class DocumentPageSplitter:
-    def __init__(self, input_file_path: str, output_dir: str = 'page_splits'):
+    def __init__(self, input_file_path: str):
         """
         Initialize page splitter for a given document
         
         Args:
             input_file_path (str): Path to the input document
-            output_dir (str, optional): Directory to save split pages. Defaults to 'page_splits'.
         """
         self.input_file_path = input_file_path
         self.file_extension = os.path.splitext(input_file_path)[1].lower()
-        
-        # Ensure output directory exists
-        self.output_dir = output_dir
-        os.makedirs(self.output_dir, exist_ok=True)
+        self._source_pdf = None
     
-    def split_pdf_pages(self) -> List[str]:
+    def _get_pdf(self) -> pikepdf.Pdf:
         """
-        Split PDF into individual page files
+        Open the PDF once and reuse it for counting and splitting
         
         Returns:
-            List[str]: Paths to split page files
+            pikepdf.Pdf: The open input document
         
         Raises:
             ValueError: If input file is not a PDF
             FileNotFoundError: If input file does not exist
         """
-        # Validate input file
-        if not os.path.exists(self.input_file_path):
-            raise FileNotFoundError(f"Input file not found: {self.input_file_path}")
+        if self._source_pdf is None:
+            # Validate input file
+            if not os.path.exists(self.input_file_path):
+                raise FileNotFoundError(f"Input file not found: {self.input_file_path}")
+            
+            if self.file_extension != '.pdf':
+                raise ValueError(f"Unsupported file type. Expected PDF, got {self.file_extension}")
+            
+            self._source_pdf = pikepdf.open(self.input_file_path)
+        
+        return self._source_pdf
+    
+    def close(self):
+        """
+        Close the input document if it was opened
+        """
+        if self._source_pdf is not None:
+            self._source_pdf.close()
+            self._source_pdf = None
+    
+    def page_count(self) -> int:
+        """
+        Count the pages of the PDF without extracting them
         
-        if self.file_extension != '.pdf':
-            raise ValueError(f"Unsupported file type. Expected PDF, got {self.file_extension}")
+        Returns:
+            int: Number of pages in the document
+        """
+        return len(self._get_pdf().pages)
+    
+    def iter_page_bytes(self) -> Iterator[Tuple[int, bytes]]:
+        """
+        Split PDF into individual in-memory pages
         
-        page_files = []
+        Yields:
+            Tuple[int, bytes]: One-based page number and single-page PDF content
         
-        # Open the PDF file
+        Raises:
+            ValueError: If input file is not a PDF or has no pages
+            FileNotFoundError: If input file does not exist
+        """
         try:
-            with open(self.input_file_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
+            source_pdf = self._get_pdf()
+            page_count = len(source_pdf.pages)
+            
+            # Verify there is something to extract
+            if not page_count:
+                raise ValueError("No pages were extracted from the PDF")
+            
+            # A single-page PDF is already its own page split
+            if page_count == 1:
+                with open(self.input_file_path, 'rb') as pdf_file:
+                    yield 1, pdf_file.read()
+                return
+            
+            # Copy each page into its own PDF in memory; qpdf shares the source's
+            # parsed objects across the copies, and only the page being yielded
+            # is held here
+            for page_num, page in enumerate(source_pdf.pages, 1):
+                page_pdf = pikepdf.Pdf.new()
+                page_pdf.pages.append(page)
                 
-                # Iterate through each page
-                for page_num in range(len(pdf_reader.pages)):
-                    # Create a new PDF writer for this page
-                    pdf_writer = PyPDF2.PdfWriter()
-                    pdf_writer.add_page(pdf_reader.pages[page_num])
-                    
-                    # Generate output path for this page
-                    output_path = os.path.join(
-                        self.output_dir, 
-                        f'page_{page_num + 1}.pdf'
-                    )
-                    
-                    # Write the page to a new PDF file
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                    
-                    page_files.append(output_path)
+                buffer = io.BytesIO()
+                page_pdf.save(buffer, linearize=False)
+                yield page_num, buffer.getvalue()
         
         except Exception as e:
             # Log the specific error
             print(f"Error splitting PDF: {e}")
-            # Clean up any partially created files
-            for file in page_files:
-                try:
-                    os.remove(file)
-                except:
-                    pass
             raise
-        
-        # Verify files were created
-        if not page_files:
-            raise ValueError("No pages were extracted from the PDF")
-        
-        return page_files
 
-    def cleanup(self):
+class RequestRateLimiter:
+    def __init__(self, min_interval: float):
         """
-        Remove the temporary page split directory
+        Enforce a minimum interval between requests issued from multiple threads
+        
+        Args:
+            min_interval (float): Minimum number of seconds between two requests
         """
-        try:
-            if os.path.exists(self.output_dir):
-                shutil.rmtree(self.output_dir)
-        except Exception as e:
-            print(f"Error cleaning up page splits: {e}")
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def wait(self):
+        """Block until the caller's request slot is reached"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
 
 class DocumentAIProcessor:
-    def __init__(self, project_id: str, location: str):
-        """Initialize Document AI and Google Cloud Storage clients"""
+    def __init__(
+        self, 
+        project_id: str, 
+        location: str,
+        max_concurrency: int = 8,
+        min_request_interval: float = 0.1
+    ):
+        """
+        Initialize Document AI and Google Cloud Storage clients
+        
+        Args:
+            project_id (str): Google Cloud project ID
+            location (str): Document AI processor location
+            max_concurrency (int, optional): Maximum number of pages processed in parallel
+            min_request_interval (float, optional): Minimum seconds between Document AI requests
+        """
         self.project_id = project_id
         self.location = location
+        self.max_concurrency = max_concurrency
         
         # Document AI client
         opts = ClientOptions(api_endpoint=f"{location}-documentai.googleapis.com")
         self.documentai_client = documentai.DocumentProcessorServiceClient(client_options=opts)
         
+        # Pace Document AI requests shared by all page workers
+        self.rate_limiter = RequestRateLimiter(min_request_interval)
+        
         # Google Cloud Storage client
         self.storage_client = storage.Client()
         
+        # Bucket handles reused across uploads
+        self._bucket_cache: Dict[str, storage.Bucket] = {}
+        
+        # Processor resource names by processor ID
+        self._processor_names: Dict[str, str] = {}
+        
         # Define main sections based on schema
         self.main_sections = [
             'charges', 'cmv', 'damage', 'disposition_of_injured_killed',
             'factors_conditions', 'identification_location', 'investigator',
             'narrative', 'vehicle_driver_persons'
         ]
+        
+        # Anchored section-prefix pattern (longest first) and memoized entity type -> section lookups
+        self._section_pattern = re.compile(
+            '|'.join(re.escape(section) for section in sorted(self.main_sections, key=len, reverse=True))
+        )
+        self._section_cache: Dict[str, Optional[str]] = {}
 
     def process_page(
         self, 
         processor_id: str, 
-        file_path: str, 
+        pdf_content: bytes, 
         page_number: int
     ) -> Dict[str, Any]:
         """
         Process a single page document
         """
         # Construct processor name
-        name = self.documentai_client.processor_path(self.project_id, self.location, processor_id)
-        
-        # Read file
-        with open(file_path, "rb") as pdf_file:
-            pdf_content = pdf_file.read()
-            print(f"Page {page_number} content size: {len(pdf_content)} bytes")
+        name = self._get_processor_name(processor_id)
+        print(f"Page {page_number} content size: {len(pdf_content)} bytes")
         
         # Prepare raw document
         raw_document = documentai.RawDocument(
@@ -172,7 +328,11 @@ class DocumentAIProcessor:
         )
         
         try:
-            result = self.documentai_client.process_document(request=request)
+            self.rate_limiter.wait()
+            result = self.documentai_client.process_document(
+                request=request,
+                retry=DOCUMENT_AI_RETRY
+            )
             document = result.document
             
             # Log document entities count
@@ -181,7 +341,6 @@ class DocumentAIProcessor:
             # Convert to dictionary with debug information
             processed_page = self._document_to_dict(document, page_number)
             processed_page['page_number'] = page_number
-            processed_page['original_file_path'] = file_path
             
             return processed_page
             
@@ -189,6 +348,41 @@ class DocumentAIProcessor:
             print(f"Error processing page {page_number}: {str(e)}")
             raise
 
+    def _get_processor_name(self, processor_id: str) -> str:
+        """
+        Return the cached full resource name of a Document AI processor
+        
+        Args:
+            processor_id (str): Document AI processor ID
+        
+        Returns:
+            str: Processor resource name
+        """
+        name = self._processor_names.get(processor_id)
+        if name is None:
+            name = self._processor_names[processor_id] = self.documentai_client.processor_path(
+                self.project_id, self.location, processor_id
+            )
+        return name
+
+    def _get_bucket(self, bucket_name: str) -> storage.Bucket:
+        """
+        Return a cached bucket handle
+        
+        No existence check is made; a missing or inaccessible bucket surfaces
+        as a 404/403 on the first upload.
+        
+        Args:
+            bucket_name (str): Name of the GCS bucket
+        
+        Returns:
+            storage.Bucket: Bucket handle
+        """
+        bucket = self._bucket_cache.get(bucket_name)
+        if bucket is None:
+            bucket = self._bucket_cache[bucket_name] = self.storage_client.bucket(bucket_name)
+        return bucket
+
     def upload_to_gcs(self, bucket_name: str, source_file_path: str, destination_blob_name: str, prefix: str = '') -> str:
         """
         Upload a file to Google Cloud Storage
@@ -203,30 +397,25 @@ class DocumentAIProcessor:
             str: GCS URI of the uploaded file
         """
         try:
-            # Remove 'gs://' if present and split bucket path
-            bucket_name = bucket_name.replace('gs://', '')
-            # Split bucket path to handle nested paths
-            bucket_parts = bucket_name.split('/')
-            base_bucket = bucket_parts[0]
+            base_bucket, full_blob_path = _resolve_blob_path(bucket_name, destination_blob_name, prefix)
             
-            # Add any additional path components to the prefix
-            if len(bucket_parts) > 1:
-                additional_path = '/'.join(bucket_parts[1:])
-                prefix = f"{additional_path}/{prefix}" if prefix else additional_path
+            # Get the cached bucket handle
+            bucket = self._get_bucket(base_bucket)
             
-            # Verify bucket exists and is accessible
-            bucket = self.storage_client.bucket(base_bucket)
+            # Small files go up in a single request, larger ones in large chunks
+            file_size = os.path.getsize(source_file_path)
+            blob = bucket.blob(full_blob_path, chunk_size=_upload_chunk_size(file_size))
             
-            if not bucket.exists():
-                raise ValueError(f"Bucket {base_bucket} does not exist or is not accessible")
-            
-            # Construct full blob path with prefix
-            full_blob_path = f"{prefix}/{destination_blob_name}" if prefix else destination_blob_name
-            full_blob_path = full_blob_path.replace('//', '/')  # Remove any double slashes
-            
-            # Upload the file
-            blob = bucket.blob(full_blob_path)
-            blob.upload_from_filename(source_file_path)
+            if file_size > GCS_UPLOAD_CHUNK_SIZE:
+                # Upload chunks of large files in parallel
+                transfer_manager.upload_chunks_concurrently(
+                    source_file_path,
+                    blob,
+                    chunk_size=GCS_UPLOAD_CHUNK_SIZE,
+                    max_workers=8
+                )
+            else:
+                blob.upload_from_filename(source_file_path, if_generation_match=0)
             
             return f"gs://{base_bucket}/{full_blob_path}"
         
@@ -250,88 +439,72 @@ class DocumentAIProcessor:
             "sections": {section: [] for section in self.main_sections}
         }
         
-        # Create entity mapping
-        entity_map = {}
+        # Bind lookups used in the entity loop once
+        get_section = self._get_entity_section
+        sections = document_dict["sections"]
         
-        # First pass: Create all entities and store in map
-        for entity in document.entities:
-            entity_id = id(entity)
-            print(f"\nProcessing entity: {entity.type_}")
+        # Depth-first walk over entities and their properties at any depth.
+        # Stack items are (entity, parent info, parent id); lists are pushed in
+        # reverse so entities keep their document order.
+        stack = [(entity, None, None) for entity in reversed(document.entities)]
+        while stack:
+            entity, parent_info, parent_id = stack.pop()
+            entity_type = entity.type_
             
-            # Get the base section type
-            section = self._get_entity_section(entity.type_)
-            if not section:
-                print(f"No section found for entity type: {entity.type_}")
-                continue
+            if parent_info is None:
+                print(f"\nProcessing entity: {entity_type}")
                 
+                # Get the base section type
+                section = get_section(entity_type)
+                if not section:
+                    print(f"No section found for entity type: {entity_type}")
+                    continue
+            
             entity_info = {
-                "type": entity.type_.lower().replace(' ', '_'),
+                "type": entity_type.translate(_TYPE_NORMALIZATION),
                 "value": entity.mention_text,
                 "confidence": entity.confidence,
                 "child_entities": [],
-                "parent_id": None,
-                "section": section  # Store section information
+                "parent_id": parent_id
             }
             
-            # Add normalized value if it exists
-            if hasattr(entity, 'normalized_value'):
-                if isinstance(entity.normalized_value, dict):
-                    entity_info["normalized_value"] = entity.normalized_value.get('text', '')
-                else:
-                    entity_info["normalized_value"] = str(entity.normalized_value)
-            
-            # Process properties (child entities)
-            if hasattr(entity, 'properties') and entity.properties:
-                print(f"Found {len(entity.properties)} child properties")
-                for child in entity.properties:
-                    child_id = id(child)
-                    child_info = {
-                        "type": child.type_.lower().replace(' ', '_'),
-                        "value": child.mention_text,
-                        "confidence": child.confidence,
-                        "child_entities": [],
-                        "parent_id": entity_id
-                    }
-                    
-                    # Process subproperties (grandchild entities)
-                    if hasattr(child, 'properties') and child.properties:
-                        print(f"Found {len(child.properties)} grandchild properties")
-                        for subchild in child.properties:
-                            subchild_id = id(subchild)
-                            subchild_info = {
-                                "type": subchild.type_.lower().replace(' ', '_'),
-                                "value": subchild.mention_text,
-                                "confidence": subchild.confidence,
-                                "parent_id": child_id
-                            }
-                            child_info["child_entities"].append(subchild_info)
-                    
-                    entity_info["child_entities"].append(child_info)
-            
-            entity_map[entity_id] = entity_info
+            if parent_info is None:
+                entity_info["section"] = section  # Store section information
+                
+                # Add normalized value if it exists
+                normalized_value = getattr(entity, 'normalized_value', None)
+                if normalized_value is not None:
+                    if isinstance(normalized_value, dict):
+                        entity_info["normalized_value"] = normalized_value.get('text', '')
+                    else:
+                        entity_info["normalized_value"] = str(normalized_value)
+                
+                # Add to appropriate section
+                sections[section].append(entity_info)
+            else:
+                parent_info["child_entities"].append(entity_info)
             
-            # Add to appropriate section
-            document_dict["sections"][section].append(entity_info)
+            # Queue properties (child entities)
+            properties = getattr(entity, 'properties', None)
+            if properties:
+                print(f"Found {len(properties)} child properties")
+                entity_id = id(entity)
+                stack.extend((child, entity_info, entity_id) for child in reversed(properties))
         
         return document_dict
 
     def _get_entity_section(self, entity_type: str) -> Optional[str]:
         """Determine which main section an entity belongs to, supporting nested types"""
-        entity_type_lower = entity_type.lower()
+        if entity_type in self._section_cache:
+            return self._section_cache[entity_type]
         
-        # Check direct section match
-        for section in self.main_sections:
-            if entity_type_lower.startswith(section):
-                return section
-                
-        # Check nested type patterns
-        if '/' in entity_type_lower:
-            base_type = entity_type_lower.split('/')[0]
-            for section in self.main_sections:
-                if base_type.startswith(section):
-                    return section
+        # A nested type ("section/child") starts with its base type, so a single
+        # anchored prefix match covers both the direct and nested cases
+        match = self._section_pattern.match(entity_type.lower())
+        matched_section = match.group(0) if match else None
         
-        return None
+        self._section_cache[entity_type] = matched_section
+        return matched_section
 
     def rename_column_type(self, section: str, name: str) -> str:
         if name == "country_name":
@@ -414,17 +587,8 @@ class DocumentAIProcessor:
     def save_json_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> str:
         """Save JSON data to Google Cloud Storage with section-based organization"""
         try:
-            bucket_name = bucket_name.replace('gs://', '')
-            bucket_parts = bucket_name.split('/')
-            base_bucket = bucket_parts[0]
-            
-            if len(bucket_parts) > 1:
-                additional_path = '/'.join(bucket_parts[1:])
-                prefix = f"{additional_path}/{prefix}" if prefix else additional_path
-            
-            bucket = self.storage_client.bucket(base_bucket)
-            full_blob_path = f"{prefix}/{filename}" if prefix else filename
-            full_blob_path = full_blob_path.replace('//', '/')
+            base_bucket, full_blob_path = _resolve_blob_path(bucket_name, filename, prefix)
+            bucket = self._get_bucket(base_bucket)
             
             # Organize data by sections
             organized_data = {
@@ -432,10 +596,15 @@ class DocumentAIProcessor:
                 "sections": data.get("sections", {})
             }
             
-            blob = bucket.blob(full_blob_path)
-            blob.upload_from_string(
-                json.dumps(organized_data, indent=2),
-                content_type='application/json'
+            payload = self._build_json_payload(organized_data)
+            
+            blob = bucket.blob(full_blob_path, chunk_size=_upload_chunk_size(len(payload)))
+            blob.upload_from_file(
+                io.BytesIO(payload),
+                size=len(payload),
+                content_type='application/json',
+                checksum='crc32c',
+                if_generation_match=0
             )
             return f"gs://{base_bucket}/{full_blob_path}"
             
@@ -443,313 +612,393 @@ class DocumentAIProcessor:
             st.error(f"JSON Save Error: {str(e)}")
             raise
 
-    def save_excel_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> str:
-        """Save hierarchical data to Excel with multiple sheets and organized location sections"""
-        try:
-            # Create Excel writer with xlsxwriter engine
-            with pd.ExcelWriter('temp_output.xlsx', engine='xlsxwriter') as writer:
-                # Process each page
-                for page in data.get("pages", []):
-                    page_num = page["page_number"]
+    def _page_start_states(self, pages: List[Dict[str, Any]]) -> Tuple[List[List[str]], List[int]]:
+        """
+        Compute the geocoding fields and person index each page starts with
+        
+        identification_location and vehicle_driver_persons sections set both, and
+        later sections read them, including sections on the following pages. Only
+        those assignments are replayed here; no rows are built and nothing is geocoded.
+        
+        Args:
+            pages (List[Dict[str, Any]]): Page entries with hierarchical fields
+        
+        Returns:
+            Tuple[List[List[str]], List[int]]: Eligible geocoding fields and person index at the start of each page
+        """
+        page_geocoding = []
+        page_person_idx = []
+        
+        # Before the first such section there are no geocoding fields and persons count from 1
+        eligible_geocoding = []
+        person_idx = 1
+        for page in pages:
+            page_geocoding.append(eligible_geocoding)
+            page_person_idx.append(person_idx)
+            
+            for parent_type, parent_entities in page.get("hierarchical_fields", {}).items():
+                if not parent_entities:
+                    continue
+                
+                if parent_type == 'identification_location':
+                    eligible_geocoding = ["city_name", "country_name"]
+                elif parent_type == 'vehicle_driver_persons':
+                    eligible_geocoding = ["address", "owner_address"]
                     
-                    # Initialize an empty dictionary to store street address components
-                    street_address = {}
-
-                    # Tracking unique identifiers for sections
-                    section_unique_trackers = {}
-
-                    # Process other sections (vehicle_driver_persons, etc.)
-                    for parent_type, parent_entities in page.get("hierarchical_fields", {}).items():
-                        # Skip identification_location as it's already processed
-                        if parent_type == 'identification_location':
-                            # Create a separate sheet for each parent entity
-                            for parent_idx, parent_entity in enumerate(parent_entities, 1):
-                                sheet_name = f"P{page_num}_identification_location_{parent_idx}"[:31]
-                                rows = []
-
-                                # Process each identification_location section
-                                section_names = ["General Information", "Road of Crash", "Intersecting Road"]
-
-                                # Define eligible field types for street address components
-                                eligible_types = ["block_num", "street_name", "street_prefix", "street_suffix"]
-
-                                # Define elgible field for geocoding
-                                geocoding_temp_address = ""
-                                eligible_geocoding = ["city_name", "country_name"]
-
-                                # identification information - general info
-                                general_info = ["crash_date","crash_time","case_id","local_use","country_name",
-                                                "city_name","outside_city_limit","crash_damage_1000","latitude","longitude"]
-                                
-                                # identification information - road of crash
-                                road_of_crash = ["rdwy_sys","hwy_num","rdwy_part","block_num","street_prefix",
-                                                "street_name","street_suffix","dir_of_traffic","speed_limit","const_zone",
-                                                "worker_present","street_desc"]
-
-                                # identification information - intersect road
-                                intersect_road = ["rdwy_sys","hwy_num","rdwy_part","block_num","street_prefix","street_name",
-                                                "street_suffix","distance_from_int_of_ref_marker","dir_from_int_or_ref_marker","ref_marker",
-                                                "speed_limit","street_desc","rrx_num"]
-
-                                for section in section_names:
-                                    # section_header = {
-                                    #     "Type": section,
-                                    #     "Value": ""
-                                    # }
-                                    # rows.append(section_header)
-
-                                    for child_type, child_entries in parent_entity.get("child_fields", {}).items():
-                                        for idx, entry in enumerate(child_entries):  # Use enumerate to get both idx and entry
-                                            if section == "General Information" and child_type in general_info:
+                    # The person loop leaves the index at the last person of the
+                    # last entity that lists any
+                    for parent_entity in parent_entities:
+                        person_entries = parent_entity.get("child_fields", {}).get('person_num', [])
+                        if person_entries:
+                            person_idx = len(person_entries)
+        
+        return page_geocoding, page_person_idx
+    
+    def _build_page_sheets(
+        self, 
+        page: Dict[str, Any], 
+        eligible_geocoding: List[str], 
+        person_idx: int
+    ) -> List[Tuple[str, str, List[Dict]]]:
+        """
+        Build the Excel rows for every sheet of a single page
+        
+        Args:
+            page (Dict[str, Any]): Page entry with hierarchical fields
+            eligible_geocoding (List[str]): Geocoding fields in effect when the page starts
+            person_idx (int): Person index in effect when the page starts
+        
+        Returns:
+            List[Tuple[str, str, List[Dict]]]: (sheet name, section type, rows) per sheet, in sheet order
+        """
+        page_sheets = []
+        page_num = page["page_number"]
+        
+        # Initialize an empty dictionary to store street address components
+        street_address = {}
+
+        # Tracking unique identifiers for sections
+        section_unique_trackers = {}
+
+        # Process other sections (vehicle_driver_persons, etc.)
+        for parent_type, parent_entities in page.get("hierarchical_fields", {}).items():
+            # Skip identification_location as it's already processed
+            if parent_type == 'identification_location':
+                # Create a separate sheet for each parent entity
+                for parent_idx, parent_entity in enumerate(parent_entities, 1):
+                    sheet_name = f"P{page_num}_identification_location_{parent_idx}"[:31]
+                    rows = []
+
+                    # Process each identification_location section
+                    section_names = ["General Information", "Road of Crash", "Intersecting Road"]
+
+                    # Define eligible field types for street address components
+                    eligible_types = ["block_num", "street_name", "street_prefix", "street_suffix"]
+
+                    # Define elgible field for geocoding
+                    geocoding_temp_address = ""
+                    eligible_geocoding = ["city_name", "country_name"]
+
+                    # identification information - general info
+                    general_info = ["crash_date","crash_time","case_id","local_use","country_name",
+                                    "city_name","outside_city_limit","crash_damage_1000","latitude","longitude"]
+                    
+                    # identification information - road of crash
+                    road_of_crash = ["rdwy_sys","hwy_num","rdwy_part","block_num","street_prefix",
+                                    "street_name","street_suffix","dir_of_traffic","speed_limit","const_zone",
+                                    "worker_present","street_desc"]
+
+                    # identification information - intersect road
+                    intersect_road = ["rdwy_sys","hwy_num","rdwy_part","block_num","street_prefix","street_name",
+                                    "street_suffix","distance_from_int_of_ref_marker","dir_from_int_or_ref_marker","ref_marker",
+                                    "speed_limit","street_desc","rrx_num"]
+
+                    for section in section_names:
+                        # section_header = {
+                        #     "Type": section,
+                        #     "Value": ""
+                        # }
+                        # rows.append(section_header)
+
+                        for child_type, child_entries in parent_entity.get("child_fields", {}).items():
+                            for idx, entry in enumerate(child_entries):  # Use enumerate to get both idx and entry
+                                if section == "General Information" and child_type in general_info:
+                                    self.add_field_row(section, child_type, entry, rows)
+
+                                    if child_type in eligible_geocoding:
+                                        if entry.get("type", "") == 'city_name':
+                                            geocoding_temp_address += entry.get("value", "") + ", "
+                                        else:
+                                            geocoding_temp_address += entry.get("value", "")
+                                            geocode_res = geocoding.call(geocoding, self.rename_column_type(section, child_type), geocoding_temp_address)
+                                            for geocode in geocode_res:
+                                                for key, value in geocode.items():
+                                                    self.add_field_row(section, key, {"value": value, "confidence": 0}, rows)
+
+                                if section == "Road of Crash" and child_type in road_of_crash:
+                                    if child_type not in eligible_types:
+                                        if child_type == 'speed_limit':
+                                            if idx == 0:
                                                 self.add_field_row(section, child_type, entry, rows)
+                                        else:
+                                            self.add_field_row(section, child_type, entry, rows)
+                                    else:
+                                        if child_type == "street_suffix":
+                                            if idx == 0:
+                                                full_address = self.construct_full_address(street_address, entry)
+                                                field_row = {
+                                                    "Type": self.rename_column_type(section, "street_address"),
+                                                    "Value": full_address
+                                                }
+                                                rows.append(field_row)
+                                        else:
+                                            street_address[child_type] = entry.get("value", "")
+
+                                if section == "Intersecting Road" and child_type in intersect_road:
+                                    if child_type not in eligible_types:
+                                        if child_type == 'speed_limit':
+                                            if idx == 1:
+                                                self.add_field_row(section, child_type, entry, rows)
+                                        else:
+                                            self.add_field_row(section, child_type, entry, rows)
+                                    else:
+                                        if child_type == "street_suffix":
+                                            if idx == 1:
+                                                full_address = self.construct_full_address(street_address, entry)
+                                                field_row = {
+                                                    "Type": self.rename_column_type(section, "street_address"),
+                                                    "Value": full_address
+                                                }
+                                                rows.append(field_row)
+                                        else:
+                                            street_address[child_type] = entry.get("value", "")
+
+                    # Add separator
+                    rows.append({
+                        "Type": "Separator",
+                        "Value": ""
+                    })
+
+                    if rows:
+                        page_sheets.append((sheet_name, parent_type, rows))
 
-                                                if child_type in eligible_geocoding:
-                                                    if entry.get("type", "") == 'city_name':
-                                                        geocoding_temp_address += entry.get("value", "") + ", "
-                                                    else:
-                                                        geocoding_temp_address += entry.get("value", "")
-                                                        geocode_res = geocoding.call(geocoding, self.rename_column_type(section, child_type), geocoding_temp_address)
-                                                        for geocode in geocode_res:
-                                                            for key, value in geocode.items():
-                                                                self.add_field_row(section, key, {"value": value, "confidence": 0}, rows)
-
-                                            if section == "Road of Crash" and child_type in road_of_crash:
-                                                if child_type not in eligible_types:
-                                                    if child_type == 'speed_limit':
-                                                        if idx == 0:
-                                                            self.add_field_row(section, child_type, entry, rows)
-                                                    else:
-                                                        self.add_field_row(section, child_type, entry, rows)
-                                                else:
-                                                    if child_type == "street_suffix":
-                                                        if idx == 0:
-                                                            full_address = self.construct_full_address(street_address, entry)
-                                                            field_row = {
-                                                                "Type": self.rename_column_type(section, "street_address"),
-                                                                "Value": full_address
-                                                            }
-                                                            rows.append(field_row)
-                                                    else:
-                                                        street_address[child_type] = entry.get("value", "")
-
-                                            if section == "Intersecting Road" and child_type in intersect_road:
-                                                if child_type not in eligible_types:
-                                                    if child_type == 'speed_limit':
-                                                        if idx == 1:
-                                                            self.add_field_row(section, child_type, entry, rows)
-                                                    else:
-                                                        self.add_field_row(section, child_type, entry, rows)
-                                                else:
-                                                    if child_type == "street_suffix":
-                                                        if idx == 1:
-                                                            full_address = self.construct_full_address(street_address, entry)
-                                                            field_row = {
-                                                                "Type": self.rename_column_type(section, "street_address"),
-                                                                "Value": full_address
-                                                            }
-                                                            rows.append(field_row)
-                                                    else:
-                                                        street_address[child_type] = entry.get("value", "")
+            if parent_type == 'vehicle_driver_persons':
+                # Create a separate sheet for each parent entity
+                for parent_idx, parent_entity in enumerate(parent_entities, 1):
+                    sheet_name = f"P{page_num}_vehicle_driver_{parent_idx}"[:31]
+                    eligible_geocoding = ["address", "owner_address"]
+
+                    rows = []
+                    
+                    # Add parent information
+                    parent_row = {
+                        "Type": parent_type,
+                        "Value": parent_entity.get('value', '')
+                    }
+                    rows.append(parent_row)
+                    
+                    # Process child fields
+                    for child_type, child_entries in parent_entity.get("child_fields", {}).items():
+                        if child_type == 'person_num':
+                            # Iterate over child_entries with person_idx starting from 1
+                            for person_idx, child_entry in enumerate(child_entries, 1):
+                                # Add person header
+                                person_header_row = {
+                                    "Type": f"Person {person_idx}",
+                                    "Value": f"Person {person_idx} Details"
+                                }
+                                rows.append(person_header_row)
+                                
+                                # Process person entities
+                                person_description = []
+                                for entity in child_entry.get("entities", []):
+                                    # Create entity_row with person_idx appended to the type
+                                    if entity.get('type', '') == 'person_description':
+                                        person_description.append(self.extract_person_description(person_idx, entity.get('value', '')))
+                                    else:
+                                        entity_row = {
+                                            "Type": str(entity.get('type', '')).replace('_', f'{person_idx}_'),
+                                            "Value": self.match_string_for_boolean(entity.get('type', ''), entity.get('value', ''))
+                                        }
+                                        
+                                        # Append the entity_row to the rows list
+                                        rows.append(entity_row)
 
+                                if len(person_description) > 0:    
+                                    for person in person_description[0]:
+                                        rows.append(person)
+                                
                                 # Add separator
                                 rows.append({
                                     "Type": "Separator",
                                     "Value": ""
                                 })
-
-                                if rows:
-                                    df = pd.DataFrame(rows)
-                                    df.rename(columns={"Type": "Merge Field Name"}, inplace=True)
-                                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-                                    
-                                    # Format the worksheet
-                                    worksheet = writer.sheets[sheet_name]
-                                    workbook = writer.book
-                                    
-                                    # Create formats
-                                    header_format = workbook.add_format({
-                                        'bold': True,
-                                        'bg_color': '#D3D3D3',
-                                        'align': 'center'
-                                    })
-                                    
-                                    separator_format = workbook.add_format({
-                                        'bottom': 1
-                                    })
-                                    
-                                    # Apply formats
-                                    for row_idx, row in enumerate(rows, 1):
-                                        # if row.get('Type') in section_names:
-                                        #     worksheet.set_row(row_idx, None, header_format)
-                                        if row.get('Type') == 'Separator':
-                                            worksheet.set_row(row_idx, None, separator_format)
-                                    
-                                    # Adjust column widths
-                                    self._adjust_column_widths(writer, sheet_name, df)
-
-                        if parent_type == 'vehicle_driver_persons':
-                            # Create a separate sheet for each parent entity
-                            for parent_idx, parent_entity in enumerate(parent_entities, 1):
-                                sheet_name = f"P{page_num}_vehicle_driver_{parent_idx}"[:31]
-                                eligible_geocoding = ["address", "owner_address"]
-
-                                rows = []
-                                
-                                # Add parent information
-                                parent_row = {
-                                    "Type": parent_type,
-                                    "Value": parent_entity.get('value', '')
+                        else:
+                            # Process other child fields
+                            for child_entry in child_entries:
+                                child_row = {
+                                    "Type": child_type,
+                                    "Value": self.match_string_for_boolean(child_type, child_entry.get('value', ''))
                                 }
-                                rows.append(parent_row)
-                                
-                                # Process child fields
-                                for child_type, child_entries in parent_entity.get("child_fields", {}).items():
-                                    if child_type == 'person_num':
-                                        # Iterate over child_entries with person_idx starting from 1
-                                        for person_idx, child_entry in enumerate(child_entries, 1):
-                                            # Add person header
-                                            person_header_row = {
-                                                "Type": f"Person {person_idx}",
-                                                "Value": f"Person {person_idx} Details"
-                                            }
-                                            rows.append(person_header_row)
-                                            
-                                            # Process person entities
-                                            person_description = []
-                                            for entity in child_entry.get("entities", []):
-                                                # Create entity_row with person_idx appended to the type
-                                                if entity.get('type', '') == 'person_description':
-                                                    person_description.append(self.extract_person_description(person_idx, entity.get('value', '')))
-                                                else:
-                                                    entity_row = {
-                                                        "Type": str(entity.get('type', '')).replace('_', f'{person_idx}_'),
-                                                        "Value": self.match_string_for_boolean(entity.get('type', ''), entity.get('value', ''))
-                                                    }
-                                                    
-                                                    # Append the entity_row to the rows list
-                                                    rows.append(entity_row)
-
-                                            if len(person_description) > 0:    
-                                                for person in person_description[0]:
-                                                    rows.append(person)
-                                            
-                                            # Add separator
-                                            rows.append({
-                                                "Type": "Separator",
-                                                "Value": ""
-                                            })
-                                    else:
-                                        # Process other child fields
-                                        for child_entry in child_entries:
-                                            child_row = {
-                                                "Type": child_type,
-                                                "Value": self.match_string_for_boolean(child_type, child_entry.get('value', ''))
+                                rows.append(child_row)
+
+                                if child_type in eligible_geocoding:
+                                    geocode_res = geocoding.call(geocoding, child_type, child_entry.get("value", ""))
+                                    for geocode in geocode_res:
+                                        for key, value in geocode.items():
+                                            field_row = {
+                                                "Type": key,
+                                                "Value": value
                                             }
-                                            rows.append(child_row)
 
-                                            if child_type in eligible_geocoding:
-                                                geocode_res = geocoding.call(geocoding, child_type, child_entry.get("value", ""))
-                                                for geocode in geocode_res:
-                                                    for key, value in geocode.items():
-                                                        field_row = {
-                                                            "Type": key,
-                                                            "Value": value
-                                                        }
+                                            rows.append(field_row)
 
-                                                        rows.append(field_row)
+                    
+                    if rows:
+                        page_sheets.append((sheet_name, parent_type, rows))
+            elif parent_type != 'identification_location':
+                # Handle other section types
+                if parent_type not in section_unique_trackers:
+                    section_unique_trackers[parent_type] = 0
+                section_unique_trackers[parent_type] += 1
+                
+                sheet_name = f"P{page_num}_{parent_type}_{section_unique_trackers[parent_type]}"[:31]
+                rows = []
+                
+                for parent_entity in parent_entities:
+                    parent_row = {
+                        "Type": parent_type,
+                        "Value": parent_entity.get('value', '')
+                    }
+                    rows.append(parent_row)
+                    
+                    for child_type, child_entries in parent_entity.get("child_fields", {}).items():
+                        for child_entry in child_entries:
+                            child_row = {
+                                "Type": child_type,
+                                "Value": self.match_string_for_boolean(child_type, child_entry.get('value', ''))
+                            }
+                            rows.append(child_row)
+
+                            if child_type in eligible_geocoding:
+                                geocode_res = geocoding.call(geocoding, child_type, child_entry.get("value", ""))
+                                for geocode in geocode_res:
+                                    for key, value in geocode.items():
+                                        field_row = {
+                                            "Type": key,
+                                            "Value": value
+                                        }
 
+                                        rows.append(field_row)
                                 
-                                if rows:
-                                    df = pd.DataFrame(rows)
-                                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-                                    
-                                    # Format worksheet
-                                    worksheet = writer.sheets[sheet_name]
-                                    workbook = writer.book
-                                    header_format = workbook.add_format({
-                                        'bold': True,
-                                        'bg_color': '#D3D3D3',
-                                        'align': 'center'
-                                    })
-                                    
-                                    separator_format = workbook.add_format({
-                                        'bottom': 1
-                                    })
-                                    
-                                    for row_idx, row in enumerate(rows, 1):
-                                        if 'Person' in row.get('Type'):
-                                            worksheet.set_row(row_idx, None, header_format)
-                                        elif row.get('Type') == 'Separator':
-                                            worksheet.set_row(row_idx, None, separator_format)
-                                    
-                                    self._adjust_column_widths(writer, sheet_name, df)
-                        elif parent_type != 'identification_location':
-                            # Handle other section types
-                            if parent_type not in section_unique_trackers:
-                                section_unique_trackers[parent_type] = 0
-                            section_unique_trackers[parent_type] += 1
-                            
-                            sheet_name = f"P{page_num}_{parent_type}_{section_unique_trackers[parent_type]}"[:31]
-                            rows = []
-                            
-                            for parent_entity in parent_entities:
-                                parent_row = {
-                                    "Type": parent_type,
-                                    "Value": parent_entity.get('value', '')
+                            for entity in child_entry.get("entities", []):
+                                entity_row = {
+                                    "Type": str(entity.get('type', '')).replace('_', f'{person_idx}_'),
+                                    "Value": self.match_string_for_boolean(entity.get('type', ''), entity.get('value', ''))
                                 }
-                                rows.append(parent_row)
-                                
-                                for child_type, child_entries in parent_entity.get("child_fields", {}).items():
-                                    for child_entry in child_entries:
-                                        child_row = {
-                                            "Type": child_type,
-                                            "Value": self.match_string_for_boolean(child_type, child_entry.get('value', ''))
-                                        }
-                                        rows.append(child_row)
-
-                                        if child_type in eligible_geocoding:
-                                            geocode_res = geocoding.call(geocoding, child_type, child_entry.get("value", ""))
-                                            for geocode in geocode_res:
-                                                for key, value in geocode.items():
-                                                    field_row = {
-                                                        "Type": key,
-                                                        "Value": value
-                                                    }
+                                rows.append(entity_row)
+                
+                if rows:
+                    page_sheets.append((sheet_name, parent_type, rows))
+        
+        return page_sheets
 
-                                                    rows.append(field_row)
-                                            
-                                        for entity in child_entry.get("entities", []):
-                                            entity_row = {
-                                                "Type": str(entity.get('type', '')).replace('_', f'{person_idx}_'),
-                                                "Value": self.match_string_for_boolean(entity.get('type', ''), entity.get('value', ''))
-                                            }
-                                            rows.append(entity_row)
-                            
-                            if rows:
-                                df = pd.DataFrame(rows)
-                                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                                self._adjust_column_widths(writer, sheet_name, df)
+    def _write_page_sheet(self, workbook, sheet_name: str, parent_type: str, rows: List[Dict], column_header_format, header_format, separator_format):
+        """Write one sheet's rows and apply the row formats for its section type"""
+        # Columns in first-seen order across the rows, as a DataFrame built from them would have
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        values = [tuple(row.get(col, '') for col in columns) for row in rows]
+        
+        header = ["Merge Field Name" if col == "Type" else col for col in columns] if parent_type == 'identification_location' else columns
+        
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, header, column_header_format)
+        
+        # Pick each row's format as it is written
+        formatted_section = parent_type in ('identification_location', 'vehicle_driver_persons')
+        person_headers = parent_type == 'vehicle_driver_persons'
+        for row_idx, (row, row_values) in enumerate(zip(rows, values), 1):
+            row_format = None
+            if formatted_section:
+                row_type = row.get('Type')
+                if person_headers and 'Person' in row_type:
+                    row_format = header_format
+                elif row_type == 'Separator':
+                    row_format = separator_format
             
-            # Upload to GCS
-            bucket_name = bucket_name.replace('gs://', '')
-            bucket = self.storage_client.bucket(bucket_name)
+            if row_format is not None:
+                worksheet.set_row(row_idx, None, row_format)
+            worksheet.write_row(row_idx, 0, row_values, row_format)
+        
+        # Adjust column widths
+        self._adjust_column_widths(worksheet, header, values)
+
+    def _write_excel_workbook(self, data: Dict[str, Any]) -> io.BytesIO:
+        """Write hierarchical data to an in-memory Excel workbook and return the rewound buffer"""
+        output = io.BytesIO()
+        
+        # Geocoding fields and the person index carry over from earlier pages, so
+        # find what each page starts with before building the pages concurrently
+        pages = data.get("pages", [])
+        page_geocoding, page_person_idx = self._page_start_states(pages)
+        
+        # Build every page's sheet rows concurrently; row building waits on
+        # geocoding requests
+        with ThreadPoolExecutor(max_workers=min(8, max(len(pages), 1))) as executor:
+            page_results = list(executor.map(self._build_page_sheets, pages, page_geocoding, page_person_idx))
+        
+        # Create Excel writer with xlsxwriter engine (not thread-safe, so sheets are written here)
+        with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs={'options': {'in_memory': True}}) as writer:
+            # Create the row formats once and share them across all sheets
+            workbook = writer.book
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#D3D3D3',
+                'align': 'center'
+            })
+            separator_format = workbook.add_format({
+                'bottom': 1
+            })
+            # Same look as the header row pandas writes
+            column_header_format = workbook.add_format({
+                'bold': True,
+                'border': 1,
+                'align': 'center',
+                'valign': 'top'
+            })
             
-            full_blob_path = f"{prefix}/{filename}" if prefix else filename
-            full_blob_path = full_blob_path.replace('//', '/')
+            for page_sheets in page_results:
+                for sheet_name, parent_type, rows in page_sheets:
+                    self._write_page_sheet(workbook, sheet_name, parent_type, rows, column_header_format, header_format, separator_format)
+        
+        output.seek(0)
+        return output
+
+    def save_excel_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> str:
+        """Save hierarchical data to Excel with multiple sheets and organized location sections"""
+        try:
+            excel_buffer = self._write_excel_workbook(data)
             
-            blob = bucket.blob(full_blob_path)
-            blob.upload_from_filename('temp_output.xlsx')
+            # Upload to GCS
+            bucket_name, full_blob_path = _resolve_blob_path(bucket_name, filename, prefix)
+            bucket = self._get_bucket(bucket_name)
             
-            # Clean up temporary file
-            os.remove('temp_output.xlsx')
+            # A known size lets the upload start without probing the stream; small
+            # workbooks go up in one request without resumable chunking
+            excel_size = excel_buffer.getbuffer().nbytes
+            blob = bucket.blob(full_blob_path, chunk_size=_upload_chunk_size(excel_size))
+            blob.upload_from_file(
+                excel_buffer,
+                rewind=True,
+                size=excel_size,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                if_generation_match=0
+            )
             
             return f"gs://{bucket_name}/{full_blob_path}"
             
         except Exception as e:
             st.error(f"Excel Save Error: {str(e)}")
-            # Clean up temp file if it exists
-            if os.path.exists('temp_output.xlsx'):
-                os.remove('temp_output.xlsx')
             raise
 
     def _process_section_data(self, section_name: str, entities: List[Dict], fields: Union[List[str], Dict]) -> pd.DataFrame:
@@ -764,182 +1013,250 @@ class DocumentAIProcessor:
         Returns:
             pd.DataFrame: Processed entities with hierarchical information
         """
+        # Extracted rows are kept as parallel column lists rather than one dict per row
+        parent_field_col = []
+        type_col = []
+        value_col = []
+        confidence_col = []
+        page_number_col = []
+        
+        def _append_row(parent_field: str, entity_type: str, value: str, entity: Dict):
+            parent_field_col.append(parent_field)
+            type_col.append(entity_type)
+            value_col.append(value)
+            confidence_col.append(float(entity.get('confidence', 0) or 0))
+            page_number_col.append(entity.get("page_number", ""))
+        
         def _extract_hierarchical_entities(
-            current_entities: List[Dict], 
+            current_entities: List[Tuple[str, Dict]], 
             current_fields: Union[List[str], Dict], 
             parent_field: str = ''
-        ) -> List[Dict]:
+        ):
             """
-            Recursively extract entities based on the field hierarchy
+            Recursively extract entities based on the field hierarchy into the column lists
             
             Args:
-                current_entities (List[Dict]): Entities to process
-                current_fields (Union[List[str], Dict]): Fields to extract
+                current_entities (List[Tuple[str, Dict]]): (lowercase type, entity) pairs to process
+                current_fields (Union[List[str], Dict]): Lowercase fields to extract
                 parent_field (str, optional): Parent field name
-            
-            Returns:
-                List[Dict]: Extracted hierarchical entities
             """
-            extracted_entities = []
-            
             # Handle list of simple fields
             if isinstance(current_fields, list):
-                for entity in current_entities:
-                    entity_type = str(entity.get("type", "")).lower()
-                    
+                field_types = set(current_fields)
+                
+                for entity_type, entity in current_entities:
                     # Check if entity type matches any of the fields
-                    if entity_type in [str(f).lower() for f in current_fields]:
-                        extracted_entities.append({
-                            "parent_field": parent_field,
-                            "type": entity_type,
-                            "value": str(entity.get("value", "")),
-                            "confidence": f"{entity.get('confidence', 0):.2%}",
-                            "page_number": entity.get("page_number", "")
-                        })
+                    if entity_type in field_types:
+                        _append_row(parent_field, entity_type, str(entity.get("value", "")), entity)
             
             # Handle nested dictionary structure
             elif isinstance(current_fields, dict):
-                for field, subfields in current_fields.items():
-                    # Convert field to string and lowercase
-                    field_str = str(field).lower()
-                    
+                # Bucket entities by lowercase type once, keeping their original order
+                entities_by_type = {}
+                for pair in current_entities:
+                    entities_by_type.setdefault(pair[0], []).append(pair)
+                
+                for field_str, subfields in current_fields.items():
                     # Find entities matching the current field
-                    matching_entities = [
-                        e for e in current_entities 
-                        if str(e.get("type", "")).lower() == field_str
-                    ]
+                    matching_entities = entities_by_type.get(field_str, [])
                     
                     # Add parent field entry if matching entities exist
                     if matching_entities:
                         # Add the parent field entry
-                        extracted_entities.append({
-                            "parent_field": parent_field,
-                            "type": field_str,
-                            "value": "",
-                            "confidence": f"{matching_entities[0].get('confidence', 0):.2%}",
-                            "page_number": matching_entities[0].get("page_number", "")
-                        })
+                        _append_row(parent_field, field_str, "", matching_entities[0][1])
                         
                         # Recursively process subfields
-                        extracted_entities.extend(
-                            _extract_hierarchical_entities(
-                                matching_entities, 
-                                subfields, 
-                                parent_field=field_str
-                            )
+                        _extract_hierarchical_entities(
+                            matching_entities, 
+                            subfields, 
+                            parent_field=field_str
                         )
-            
-            return extracted_entities
         
         # Main processing: extract entities based on fields
         try:
-            processed_rows = _extract_hierarchical_entities(entities, fields)
+            # Lowercase the field names and entity types once for the whole recursion
+            if fields is self._FIELD_HIERARCHY:
+                fields = self._FIELD_HIERARCHY_LOWER
+            else:
+                fields = _lowercase_field_hierarchy(fields)
+            typed_entities = [(str(entity.get("type", "")).lower(), entity) for entity in entities]
+            
+            _extract_hierarchical_entities(typed_entities, fields)
             
-            # Convert to DataFrame, return empty DataFrame if no rows
-            return pd.DataFrame(processed_rows) if processed_rows else pd.DataFrame()
+            # Build the DataFrame column-wise, return empty DataFrame if no rows
+            if not type_col:
+                return pd.DataFrame()
+            return pd.DataFrame({
+                "parent_field": parent_field_col,
+                "type": type_col,
+                "value": value_col,
+                "confidence": confidence_col,
+                "page_number": page_number_col
+            }, copy=False)
         
         except Exception as e:
             # Log any unexpected errors during processing
             print(f"Error processing section {section_name}: {e}")
             return pd.DataFrame()
 
-    def _adjust_column_widths(self, writer, sheet_name, df):
-        """Adjust column widths in Excel worksheet"""
-        worksheet = writer.sheets[sheet_name]
-        for idx, col in enumerate(df.columns):
-            # Get maximum length of column items
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(str(col))
-            ) + 2
-            worksheet.set_column(idx, idx, min(max_length, 50))  # Cap width at 50
+    def _adjust_column_widths(self, worksheet, columns, rows):
+        """Adjust column widths in Excel worksheet from the header and row tuples written to it"""
+        # Longest cell per column (stringified) and longest header, in one array pass
+        header_lengths = np.fromiter((len(str(col)) for col in columns), dtype=np.int64, count=len(columns))
+        if rows:
+            cell_lengths = _str_len(np.array([[str(value) for value in row] for row in rows], dtype=object)).max(axis=0)
+            max_lengths = np.maximum(cell_lengths, header_lengths)
+        else:
+            max_lengths = header_lengths
+        
+        widths = np.minimum(max_lengths + 2, 50)  # Cap width at 50
+        for idx, width in enumerate(widths):
+            worksheet.set_column(idx, idx, int(width))
+
+    # Hierarchical structure of fields, built once for the class
+    _FIELD_HIERARCHY = {
+        'charges': {
+            'unit_num': ['charge', 'citation_ref_num', 'person_num_charges', 'unit_num_charges']
+        },
+        'cmv': [
+            'actual_gross_weight', 'bus_type_cmv', 'capacity_cmv', 'cargo_body_type',
+            'carrier_corp_name', 'carrier_id_num', 'carrier_id_type_cmv', 
+            'carrier_primary_address', 'cmv_disabling_damage', 'disabling_damage_cmv',
+            'hazmat_class_num', 'hazmat_id_num', 'hazmat_released', 'intermodal_shipping',
+            'lbs_cmv', 'rgvw_gvwr', 'rgvw_gvwr_tick_box', 'sequence_event_1',
+            'sequence_event_2', 'sequence_event_3', 'sequence_event_4', 'total_num_axies',
+            'transporting_hazardous_material_cmv', 'trlr_type', 'unit_num_cmv',
+            'veh_oper_cmv', 'veh_type_cmv'
+        ],
+        'damage': {
+            'damaged_property_other_than_vehicle': [
+                'damaged_property', 'owner_address_damage', 'owner_name_damage'
+            ]
+        },
+        'disposition_of_injured_killed': {
+            'unit_num_disposition': [
+                'date_of_death', 'person_num_disposition', 'taken_by', 'taken_to',
+                'time_of_death', 'unit_num_disp'
+            ]
+        },
+        'factors_conditions': {
+            'unit_contributing_factors': [
+                'contributing_contributing_factors', 'contributing_vehicle_defects',
+                'entering_roads', 'light_cond', 'may_have_contrib_vehicle_defects',
+                'may_have_contributing_factors', 'roadway_alignment', 'roadway_type',
+                'surface_condition', 'traffic_control', 'unit_num_contributing',
+                'weather_cond'
+            ]
+        },
+        'identification_location': [
+            'block_num', 'case_id', 'city_name', 'const_zone', 'country_name',
+            'crash_damage_1000', 'crash_date', 'crash_time', 'dir_from_int_or_ref_marker',
+            'dir_of_traffic', 'distance_from_int_of_ref_marker', 'hwy_num', 'latitude',
+            'local_use', 'longitude', 'outside_city_limit', 'rdwy_part', 'rdwy_sys',
+            'ref_marker', 'rrx_num', 'speed_limit', 'street_desc', 'street_name',
+            'street_prefix', 'street_suffix', 'worker_present'
+        ],
+        'investigator': [
+            'agency_name', 'date_arrived', 'date_notified', 'date_roadway',
+            'date_scene_cleared', 'how_notified', 'id_num_investigator',
+            'investigation_complete', 'investigator_name', 'ori_num', 'report_date',
+            'service_region_da', 'time_arrived', 'time_notified', 'time_roadway',
+            'time_scene_cleared'
+        ],
+        'narrative': ['investigator_narrative_opinion'],
+        'vehicle_driver_persons': [
+            'address', 'autonomous_level_engaged', 'autonomous_unit', 'body_style',
+            'cdl_end', 'dl_class', 'dl_id_num', 'dl_id_state', 'dl_id_type', 'dl_rest',
+            'dob', 'fin_resp_name', 'fin_resp_number', 'fin_resp_phone_num',
+            'fin_resp_type', 'hit_and_run', 'lp_num', 'lp_state', 'owner_address',
+            'owner_lesse_tick_box', 'owner_name', 'parked_vehicle',
+            'proof_of_fin_resp', 'towed_by', 'towed_to', 'unit_desc', 'unit_num',
+            'veh_color', 'veh_make', 'veh_model', 'veh_year',
+            'vehicle_damage_rating', 'vehicle_damage_rating2', 'vin', 
+            {
+                'person_num': [
+                    'person_description', 'person_name', 'person_num1',
+                    'person_seat_position', 'person_type'
+                ]
+            }
+        ]
+    }
+
+    # Same hierarchy with lowercase keys, as matched against entity types
+    _FIELD_HIERARCHY_LOWER = _lowercase_field_hierarchy(_FIELD_HIERARCHY)
 
     def _get_field_hierarchy(self) -> Dict[str, Union[List[str], Dict]]:
         """Define the hierarchical structure of fields"""
-        return {
-            'charges': {
-                'unit_num': ['charge', 'citation_ref_num', 'person_num_charges', 'unit_num_charges']
-            },
-            'cmv': [
-                'actual_gross_weight', 'bus_type_cmv', 'capacity_cmv', 'cargo_body_type',
-                'carrier_corp_name', 'carrier_id_num', 'carrier_id_type_cmv', 
-                'carrier_primary_address', 'cmv_disabling_damage', 'disabling_damage_cmv',
-                'hazmat_class_num', 'hazmat_id_num', 'hazmat_released', 'intermodal_shipping',
-                'lbs_cmv', 'rgvw_gvwr', 'rgvw_gvwr_tick_box', 'sequence_event_1',
-                'sequence_event_2', 'sequence_event_3', 'sequence_event_4', 'total_num_axies',
-                'transporting_hazardous_material_cmv', 'trlr_type', 'unit_num_cmv',
-                'veh_oper_cmv', 'veh_type_cmv'
-            ],
-            'damage': {
-                'damaged_property_other_than_vehicle': [
-                    'damaged_property', 'owner_address_damage', 'owner_name_damage'
-                ]
-            },
-            'disposition_of_injured_killed': {
-                'unit_num_disposition': [
-                    'date_of_death', 'person_num_disposition', 'taken_by', 'taken_to',
-                    'time_of_death', 'unit_num_disp'
-                ]
-            },
-            'factors_conditions': {
-                'unit_contributing_factors': [
-                    'contributing_contributing_factors', 'contributing_vehicle_defects',
-                    'entering_roads', 'light_cond', 'may_have_contrib_vehicle_defects',
-                    'may_have_contributing_factors', 'roadway_alignment', 'roadway_type',
-                    'surface_condition', 'traffic_control', 'unit_num_contributing',
-                    'weather_cond'
-                ]
-            },
-            'identification_location': [
-                'block_num', 'case_id', 'city_name', 'const_zone', 'country_name',
-                'crash_damage_1000', 'crash_date', 'crash_time', 'dir_from_int_or_ref_marker',
-                'dir_of_traffic', 'distance_from_int_of_ref_marker', 'hwy_num', 'latitude',
-                'local_use', 'longitude', 'outside_city_limit', 'rdwy_part', 'rdwy_sys',
-                'ref_marker', 'rrx_num', 'speed_limit', 'street_desc', 'street_name',
-                'street_prefix', 'street_suffix', 'worker_present'
-            ],
-            'investigator': [
-                'agency_name', 'date_arrived', 'date_notified', 'date_roadway',
-                'date_scene_cleared', 'how_notified', 'id_num_investigator',
-                'investigation_complete', 'investigator_name', 'ori_num', 'report_date',
-                'service_region_da', 'time_arrived', 'time_notified', 'time_roadway',
-                'time_scene_cleared'
-            ],
-            'narrative': ['investigator_narrative_opinion'],
-            'vehicle_driver_persons': [
-                'address', 'autonomous_level_engaged', 'autonomous_unit', 'body_style',
-                'cdl_end', 'dl_class', 'dl_id_num', 'dl_id_state', 'dl_id_type', 'dl_rest',
-                'dob', 'fin_resp_name', 'fin_resp_number', 'fin_resp_phone_num',
-                'fin_resp_type', 'hit_and_run', 'lp_num', 'lp_state', 'owner_address',
-                'owner_lesse_tick_box', 'owner_name', 'parked_vehicle',
-                'proof_of_fin_resp', 'towed_by', 'towed_to', 'unit_desc', 'unit_num',
-                'veh_color', 'veh_make', 'veh_model', 'veh_year',
-                'vehicle_damage_rating', 'vehicle_damage_rating2', 'vin', 
-                {
-                    'person_num': [
-                        'person_description', 'person_name', 'person_num1',
-                        'person_seat_position', 'person_type'
-                    ]
-                }
-            ]
-        }
+        return self._FIELD_HIERARCHY
 
-    def _adjust_column_widths(self, writer, sheet_name, df):
-        """Adjust column widths in Excel worksheet"""
-        worksheet = writer.sheets[sheet_name]
-        for idx, col in enumerate(df.columns):
-            # Get maximum length of column items
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(str(col))
-            ) + 2
-            worksheet.set_column(idx, idx, min(max_length, 50))  # Cap width at 50
+    def _build_page_data(self, processed_page: Dict[str, Any], page_num: int) -> Dict[str, Any]:
+        """
+        Build the hierarchical page entry from a processed page
+        
+        Args:
+            processed_page (Dict[str, Any]): Result of _document_to_dict for one page
+            page_num (int): 1-based page number
+        
+        Returns:
+            Dict[str, Any]: Page data with hierarchical fields per section
+        """
+        page_data = {
+            "page_number": page_num,
+            "text": processed_page.get('text', ''),
+            "hierarchical_fields": {}
+        }
+        
+        # Process each section
+        hierarchical_fields = page_data["hierarchical_fields"]
+        for section, entities in processed_page.get('sections', {}).items():
+            if not entities:
+                continue
+            
+            # Bind the section list once for all of its entities
+            append_parent = hierarchical_fields.setdefault(section, []).append
+            
+            # Process each entity in the section
+            for entity in entities:
+                child_fields = {}
+                parent_entry = {
+                    "type": entity["type"],
+                    "value": entity.get('value', ''),
+                    "confidence": entity.get('confidence', 0),
+                    "child_fields": child_fields
+                }
+                
+                # Process child entities
+                for child in entity.get("child_entities", []):
+                    child_type = child["type"]
+                    grandchild_entries = []
+                    child_entry = {
+                        "type": child_type,
+                        "value": child.get('value', ''),
+                        "confidence": child.get('confidence', 0),
+                        "entities": grandchild_entries
+                    }
+                    
+                    # Process grandchild entities
+                    append_grandchild = grandchild_entries.append
+                    for grandchild in child.get("child_entities", []):
+                        append_grandchild({
+                            "type": grandchild["type"],
+                            "value": grandchild.get('value', ''),
+                            "confidence": grandchild.get('confidence', 0)
+                        })
+                    
+                    child_fields.setdefault(child_type, []).append(child_entry)
+                
+                # Add parent entry to appropriate section
+                append_parent(parent_entry)
+        
+        return page_data
 
     def process_document_page_by_page(
         self, 
         input_file_path: str, 
         processor_id: str,
-        cleanup: bool = True
+        page_splitter: Optional[DocumentPageSplitter] = None
     ) -> Dict[str, Any]:
         """
         Process document pages concurrently using ThreadPoolExecutor
@@ -947,17 +1264,18 @@ class DocumentAIProcessor:
         Args:
             input_file_path (str): Path to the input PDF file
             processor_id (str): Document AI processor ID
-            cleanup (bool): Whether to remove temporary page files after processing
+            page_splitter (DocumentPageSplitter, optional): Splitter that already has the
+                PDF open and stays open for the caller; one is created and closed here
+                when omitted
         
         Returns:
             Dict[str, Any]: Processed document results
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        import concurrent.futures
-        
-        # Split PDF into individual page files
-        page_splitter = DocumentPageSplitter(input_file_path)
-        page_files = page_splitter.split_pdf_pages()
+        # Split PDF into individual in-memory pages, lazily
+        owns_splitter = page_splitter is None
+        if owns_splitter:
+            page_splitter = DocumentPageSplitter(input_file_path)
+        total_pages = page_splitter.page_count()
         
         # Initialize document result structure
         full_document_result = {
@@ -967,111 +1285,69 @@ class DocumentAIProcessor:
         
         # Create progress tracking
         progress_bar = st.progress(0)
-        total_pages = len(page_files)
         progress_text = st.empty()
         
         try:
             # Determine optimal number of workers
-            max_workers = min(10, total_pages)
+            max_workers = max(1, min(self.max_concurrency, total_pages))
             
-            # Use ThreadPoolExecutor for concurrent processing
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit processing tasks for each page
-                future_to_page = {
-                    executor.submit(
-                        self.process_page, 
+            def process_page_or_error(page_num: int, page_content: bytes):
+                """Process one page, returning the error instead of raising it"""
+                try:
+                    return self.process_page(
                         processor_id=processor_id, 
-                        file_path=page_file, 
-                        page_number=i
-                    ): i 
-                    for i, page_file in enumerate(page_files, 1)
-                }
-                
-                # Process completed futures in order
-                processed_pages = [None] * total_pages
-                
-                # Collect results as they complete
-                for future in as_completed(future_to_page):
-                    page_num = future_to_page[future]
-                    try:
-                        # Update progress
-                        progress_text.text(f"Processing page {page_num} of {total_pages}")
-                        progress_bar.progress(page_num / total_pages)
-                        
-                        # Process the page
-                        processed_page = future.result()
-                        
-                        # Prepare page data
-                        page_data = {
-                            "page_number": page_num,
-                            "text": processed_page.get('text', ''),
-                            "hierarchical_fields": {}
-                        }
-                        
-                        # Process each section
-                        for section, entities in processed_page.get('sections', {}).items():
-                            if not entities:
-                                continue
-                            
-                            # Initialize section in hierarchical fields if not exists
-                            if section not in page_data["hierarchical_fields"]:
-                                page_data["hierarchical_fields"][section] = []
-                            
-                            # Process each entity in the section
-                            for entity in entities:
-                                parent_entry = {
-                                    "type": entity["type"],
-                                    "value": entity.get('value', ''),
-                                    "confidence": entity.get('confidence', 0),
-                                    "child_fields": {}
-                                }
-                                
-                                # Process child entities
-                                for child in entity.get("child_entities", []):
-                                    child_type = child["type"]
-                                    if child_type not in parent_entry["child_fields"]:
-                                        parent_entry["child_fields"][child_type] = []
-                                    
-                                    child_entry = {
-                                        "type": child_type,
-                                        "value": child.get('value', ''),
-                                        "confidence": child.get('confidence', 0),
-                                        "entities": []
-                                    }
-                                    
-                                    # Process grandchild entities
-                                    for grandchild in child.get("child_entities", []):
-                                        entity_entry = {
-                                            "type": grandchild["type"],
-                                            "value": grandchild.get('value', ''),
-                                            "confidence": grandchild.get('confidence', 0)
-                                        }
-                                        child_entry["entities"].append(entity_entry)
-                                    
-                                    parent_entry["child_fields"][child_type].append(child_entry)
-                                
-                                # Add parent entry to appropriate section
-                                page_data["hierarchical_fields"][section].append(parent_entry)
-                        
-                        # Store page in the correct order
-                        processed_pages[page_num - 1] = page_data
+                        pdf_content=page_content, 
+                        page_number=page_num
+                    ), None
+                except Exception as e:
+                    return None, e
+            
+            # Use ThreadPoolExecutor for concurrent processing; progress advances as
+            # pages finish, and results are slotted by page so the output stays in order
+            page_results = [None] * total_pages
+            completed = 0
+            
+            def record_results(futures):
+                """Slot finished pages into the results and update progress"""
+                nonlocal completed
+                for future in futures:
+                    page_results[in_flight.pop(future) - 1] = future.result()
+                    completed += 1
                     
-                    except Exception as e:
-                        st.error(f"Error processing page {page_num}: {str(e)}")
-                        # Store None for failed pages to maintain order
-                        processed_pages[page_num - 1] = None
+                    # Update progress
+                    progress_text.text(f"Processed {completed} of {total_pages} pages")
+                    progress_bar.progress(completed / total_pages)
+            
+            # The splitter renders pages lazily and a new page is only pulled once
+            # the window has room, so at most max_in_flight page buffers are alive
+            max_in_flight = max_workers * 2
+            in_flight = {}
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for page_num, page_content in page_splitter.iter_page_bytes():
+                    if len(in_flight) >= max_in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        record_results(done)
+                    in_flight[executor.submit(process_page_or_error, page_num, page_content)] = page_num
                 
-                # Filter out failed pages and add to final result
-                full_document_result["pages"] = [
-                    page for page in processed_pages if page is not None
-                ]
+                record_results(as_completed(in_flight))
+            
+            for page_num, (processed_page, error) in enumerate(page_results, 1):
+                # Skip failed pages
+                if error is not None:
+                    st.error(f"Error processing page {page_num}: {str(error)}")
+                    continue
                 
-                # Combine text from all pages
-                full_document_result["text"] = '\n'.join(
-                    page.get('text', '') for page in full_document_result["pages"]
+                # Prepare page data
+                full_document_result["pages"].append(
+                    self._build_page_data(processed_page, page_num)
                 )
+            
+            # Combine text from all pages
+            full_document_result["text"] = '\n'.join(
+                page.get('text', '') for page in full_document_result["pages"]
+            )
         
-        except concurrent.futures.CancelledError:
+        except CancelledError:
             st.error("Document processing was cancelled")
             raise
         
@@ -1084,25 +1360,294 @@ class DocumentAIProcessor:
             progress_bar.empty()
             progress_text.empty()
             
-            # Remove temporary page files if cleanup is requested
-            if cleanup:
-                for page_file in page_files:
-                    try:
-                        os.remove(page_file)
-                    except Exception as cleanup_error:
-                        st.warning(f"Could not remove temporary file {page_file}: {cleanup_error}")
+            # Release the source PDF unless the caller still needs it
+            if owns_splitter:
+                page_splitter.close()
         
         return full_document_result
 
+    def _split_document_by_page(self, document, page_offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Split a multi-page Document AI result into per-page processed dicts
+        
+        Args:
+            document (documentai.Document): Document (or output shard) covering several pages
+            page_offset (int): Index of the first page of this shard in the full document
+        
+        Returns:
+            List[Dict[str, Any]]: One processed page per document page
+        """
+        page_count = max(len(document.pages), 1)
+        page_entities = [[] for _ in range(page_count)]
+        
+        # Bucket top-level entities by the page they are anchored to
+        for entity in document.entities:
+            page_refs = entity.page_anchor.page_refs
+            page_index = int(page_refs[0].page) if page_refs else 0
+            page_entities[min(page_index, page_count - 1)].append(entity)
+        
+        processed_pages = []
+        for page_index in range(page_count):
+            page_text = document.text
+            if document.pages:
+                page_text = ''.join(
+                    document.text[int(segment.start_index):int(segment.end_index)]
+                    for segment in document.pages[page_index].layout.text_anchor.text_segments
+                )
+            
+            page_number = page_offset + page_index + 1
+            page_document = documentai.Document(
+                text=page_text,
+                entities=page_entities[page_index]
+            )
+            processed_page = self._document_to_dict(page_document, page_number)
+            processed_page['page_number'] = page_number
+            processed_pages.append(processed_page)
+        
+        return processed_pages
+
+    def process_document_sync(self, input_file_path: str, processor_id: str) -> Dict[str, Any]:
+        """
+        Process the whole document with a single synchronous request
+        
+        Args:
+            input_file_path (str): Path to the input PDF file
+            processor_id (str): Document AI processor ID
+        
+        Returns:
+            Dict[str, Any]: Processed document results
+        """
+        name = self._get_processor_name(processor_id)
+        
+        with open(input_file_path, "rb") as pdf_file:
+            pdf_content = pdf_file.read()
+        
+        request = documentai.ProcessRequest(
+            name=name,
+            raw_document=documentai.RawDocument(
+                content=pdf_content, 
+                mime_type="application/pdf"
+            )
+        )
+        
+        with st.spinner("Processing document..."):
+            self.rate_limiter.wait()
+            result = self.documentai_client.process_document(
+                request=request,
+                retry=DOCUMENT_AI_RETRY
+            )
+        document = result.document
+        logger.info("Document found %d entities", len(document.entities))
+        
+        # Bucket the entities back into pages
+        pages = [
+            self._build_page_data(processed_page, processed_page['page_number'])
+            for processed_page in self._split_document_by_page(document)
+        ]
+        
+        return {
+            "text": '\n'.join(page.get('text', '') for page in pages),
+            "pages": pages
+        }
+
+    def process_document_batch(
+        self, 
+        input_file_path: str, 
+        processor_id: str, 
+        bucket_name: str, 
+        prefix: str = 'batch', 
+        timeout: float = 600
+    ) -> Dict[str, Any]:
+        """
+        Process the whole document with a single batch_process_documents operation
+        
+        The staged input and the operation output are deleted from GCS afterwards,
+        and an operation that times out is cancelled.
+        
+        Args:
+            input_file_path (str): Path to the input PDF file
+            processor_id (str): Document AI processor ID
+            bucket_name (str): GCS bucket used for batch input and output
+            prefix (str, optional): Prefix/folder path for the batch files
+            timeout (float, optional): Seconds to wait for the operation
+        
+        Returns:
+            Dict[str, Any]: Processed document results
+        """
+        name = self._get_processor_name(processor_id)
+        base_name = os.path.splitext(os.path.basename(input_file_path))[0]
+        
+        # Stage the PDF in GCS for the batch operation
+        input_gcs_uri = self.upload_to_gcs(
+            bucket_name, 
+            input_file_path, 
+            os.path.basename(input_file_path), 
+            prefix=f"{prefix}/input"
+        )
+        output_gcs_uri = f"gs://{bucket_name.replace('gs://', '').rstrip('/')}/{prefix}/output/{base_name}/"
+        
+        request = documentai.BatchProcessRequest(
+            name=name,
+            input_documents=documentai.BatchDocumentsInputConfig(
+                gcs_documents=documentai.GcsDocuments(
+                    documents=[
+                        documentai.GcsDocument(
+                            gcs_uri=input_gcs_uri,
+                            mime_type="application/pdf"
+                        )
+                    ]
+                )
+            ),
+            document_output_config=documentai.DocumentOutputConfig(
+                gcs_output_config=documentai.DocumentOutputConfig.GcsOutputConfig(
+                    gcs_uri=output_gcs_uri
+                )
+            )
+        )
+        
+        try:
+            with st.spinner("Processing document..."):
+                operation = self.documentai_client.batch_process_documents(request=request)
+                try:
+                    operation.result(timeout=timeout)
+                except Exception:
+                    # Timed out or interrupted: stop the operation so it does not
+                    # keep running and writing output after we fall back
+                    operation.cancel()
+                    raise
+            
+            metadata = documentai.BatchProcessMetadata(operation.metadata)
+            if metadata.state != documentai.BatchProcessMetadata.State.SUCCEEDED:
+                raise ValueError(f"Batch processing failed: {metadata.state_message}")
+            
+            # Read back the output shards and split them into pages
+            processed_pages = []
+            for process in metadata.individual_process_statuses:
+                match = re.match(r"gs://(.*?)/(.*)", process.output_gcs_destination)
+                if not match:
+                    continue
+                output_bucket, output_prefix = match.groups()
+                
+                for blob in self.storage_client.list_blobs(output_bucket, prefix=output_prefix):
+                    if not blob.name.endswith('.json'):
+                        continue
+                    document = documentai.Document.from_json(
+                        blob.download_as_bytes(), 
+                        ignore_unknown_fields=True
+                    )
+                    logger.info("Shard %s found %d entities", blob.name, len(document.entities))
+                    processed_pages.extend(
+                        self._split_document_by_page(document, int(document.shard_info.page_offset))
+                    )
+            
+            processed_pages.sort(key=lambda page: page['page_number'])
+            pages = [
+                self._build_page_data(processed_page, processed_page['page_number'])
+                for processed_page in processed_pages
+            ]
+        
+        finally:
+            # The staged PDF and Document AI's full-text output can hold PII;
+            # never leave them in the bucket, whether or not processing succeeded
+            self._delete_batch_files(input_gcs_uri, output_gcs_uri)
+        
+        return {
+            "text": '\n'.join(page.get('text', '') for page in pages),
+            "pages": pages
+        }
+
+    def _delete_batch_files(self, input_gcs_uri: str, output_gcs_uri: str):
+        """
+        Delete the staged input PDF and every object under the batch output prefix
+        
+        Cleanup failures are logged rather than raised, so they never hide the
+        processing result or error.
+        
+        Args:
+            input_gcs_uri (str): GCS URI of the staged input PDF
+            output_gcs_uri (str): GCS URI prefix of the batch operation output
+        """
+        try:
+            input_bucket, input_blob = re.match(r"gs://(.*?)/(.*)", input_gcs_uri).groups()
+            self._get_bucket(input_bucket).blob(input_blob).delete()
+        except Exception as e:
+            logger.warning("Error deleting staged batch input %s: %s", input_gcs_uri, e)
+        
+        try:
+            output_bucket, output_prefix = re.match(r"gs://(.*?)/(.*)", output_gcs_uri).groups()
+            self._get_bucket(output_bucket).delete_blobs(
+                list(self.storage_client.list_blobs(output_bucket, prefix=output_prefix)),
+                on_error=lambda blob: logger.warning("Error deleting batch output %s", blob.name)
+            )
+        except Exception as e:
+            logger.warning("Error deleting batch output under %s: %s", output_gcs_uri, e)
+
+    def process_document(
+        self, 
+        input_file_path: str, 
+        processor_id: str, 
+        bucket_name: str
+    ) -> Dict[str, Any]:
+        """
+        Process a document in as few requests as possible, splitting pages only as a fallback
+        
+        Documents within the synchronous page limit go in one process_document
+        request; larger ones use one batch operation.
+        
+        Args:
+            input_file_path (str): Path to the input PDF file
+            processor_id (str): Document AI processor ID
+            bucket_name (str): GCS bucket used for batch input and output
+        
+        Returns:
+            Dict[str, Any]: Processed document results
+        """
+        # Open the PDF once; the page count and a page-by-page split share it
+        page_splitter = DocumentPageSplitter(input_file_path)
+        try:
+            page_count = page_splitter.page_count()
+            if page_count <= 1:
+                return self.process_document_page_by_page(input_file_path, processor_id, page_splitter)
+            
+            try:
+                if page_count <= SYNC_PROCESS_MAX_PAGES:
+                    return self.process_document_sync(input_file_path, processor_id)
+                return self.process_document_batch(input_file_path, processor_id, bucket_name)
+            except Exception as e:
+                print(f"Whole-document processing failed, falling back to page-by-page: {str(e)}")
+                return self.process_document_page_by_page(input_file_path, processor_id, page_splitter)
+        
+        finally:
+            page_splitter.close()
+
     def display_document_results(self, document_result: Dict[str, Any]):
         """Display document results with a flat hierarchy structure"""
         # Remove the duplicate "Document Analysis Results" header
         
-        for page in document_result.get("pages", []):
+        pages = document_result.get("pages", [])
+        expanded = False
+        
+        # Large documents only build the widgets of the selected page on each rerun
+        if len(pages) > RESULTS_PAGE_PICKER_THRESHOLD:
+            selected_index = st.selectbox(
+                "Jump to page",
+                range(len(pages)),
+                format_func=lambda index: f"Page {pages[index]['page_number']}"
+            )
+            pages = pages[selected_index:selected_index + 1]
+            expanded = True
+        
+        for page in pages:
             page_num = page["page_number"]
-            with st.expander(f"Page {page_num}"):
+            hierarchical_fields = page.get("hierarchical_fields")
+            with st.expander(f"Page {page_num}", expanded=expanded):
+                # Add a message if no entities found
+                if not hierarchical_fields:
+                    st.info("No entities found on this page")
+                    continue
+                
                 # Create sections for different parent types
-                for parent_type, parent_entities in page.get("hierarchical_fields", {}).items():
+                for parent_type, parent_entities in hierarchical_fields.items():
                     if parent_entities:  # Only show sections with data
                         st.subheader(f"Section: {parent_type.replace('_', ' ').title()}")
                         
@@ -1119,50 +1664,40 @@ class DocumentAIProcessor:
                                     st.markdown(f"**Value:** {parent_entity['value']}")
                                 st.markdown(f"**Confidence:** {parent_entity['confidence']:.2%}")
                                 
-                                # Process child fields
-                                child_fields = parent_entity.get("child_fields", {})
-                                if child_fields:
-                                    for child_type, child_entries in child_fields.items():
-                                        if child_entries:
-                                            st.markdown(f"### {child_type.replace('_', ' ').title()}")
-                                            
-                                            # Create DataFrame for child entries and their entities
-                                            all_data = []
-                                            
-                                            for child_entry in child_entries:
-                                                # Add child entry data
-                                                if child_entry.get('value'):
-                                                    child_row = {
-                                                        "Level": "Child Field",
-                                                        "Type": child_type,
-                                                        "Value": child_entry['value'],
-                                                        "Confidence": f"{child_entry['confidence']:.2%}"
-                                                    }
-                                                    all_data.append(child_row)
-                                                
-                                                # Add entity data
-                                                for entity in child_entry.get("entities", []):
-                                                    entity_row = {
-                                                        "Level": "Entity",
-                                                        "Type": entity['type'],
-                                                        "Value": entity['value'],
-                                                        "Confidence": f"{entity['confidence']:.2%}"
-                                                    }
-                                                    all_data.append(entity_row)
-                                            
-                                            if all_data:
-                                                df = pd.DataFrame(all_data)
-                                                st.dataframe(
-                                                    df,
-                                                    use_container_width=True,
-                                                    hide_index=True
-                                                )
+                                # Process child fields into one table for the whole entity
+                                section_rows = []
+                                for child_type, child_entries in parent_entity.get("child_fields", {}).items():
+                                    child_label = child_type.replace('_', ' ').title()
+                                    for child_entry in child_entries:
+                                        # Add child entry data
+                                        if child_entry.get('value'):
+                                            section_rows.append((
+                                                child_label,
+                                                "Child Field",
+                                                child_type,
+                                                child_entry['value'],
+                                                f"{child_entry['confidence']:.2%}"
+                                            ))
+                                        
+                                        # Add entity data
+                                        for entity in child_entry.get("entities", []):
+                                            section_rows.append((
+                                                child_label,
+                                                "Entity",
+                                                entity['type'],
+                                                entity['value'],
+                                                f"{entity['confidence']:.2%}"
+                                            ))
+                                
+                                if section_rows:
+                                    df = pd.DataFrame.from_records(section_rows, columns=RESULT_TABLE_COLUMNS)
+                                    st.dataframe(
+                                        df,
+                                        use_container_width=True,
+                                        hide_index=True
+                                    )
                                 
                                 st.markdown("---")
-                    
-                    # Add a message if no entities found
-                    if not page.get("hierarchical_fields"):
-                        st.info("No entities found on this page")
 
     def save_to_gcs_as_json(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> str:
         """
@@ -1178,27 +1713,23 @@ class DocumentAIProcessor:
             str: GCS URI of the saved JSON file
         """
         try:
-            # Remove 'gs://' if present
-            bucket_name = bucket_name.replace('gs://', '')
-            
-            # Create storage client
-            bucket = self.storage_client.bucket(bucket_name)
-            
             # Prepare the full blob path
-            json_filename = filename.replace('.xlsx', '.json')
-            full_blob_path = f"{prefix}/{json_filename}" if prefix else json_filename
-            full_blob_path = full_blob_path.replace('//', '/')
+            bucket_name, full_blob_path = _resolve_blob_path(
+                bucket_name, filename.replace('.xlsx', '.json'), prefix
+            )
+            
+            # Get cached bucket handle
+            bucket = self._get_bucket(bucket_name)
             
             # Create JSON blob
             blob = bucket.blob(full_blob_path)
             
-            # Convert data to JSON string with proper formatting
-            json_str = json.dumps(data, indent=2, ensure_ascii=False)
-            
             # Upload JSON to GCS
             blob.upload_from_string(
-                json_str,
-                content_type='application/json'
+                self._build_json_payload(data),
+                content_type='application/json',
+                checksum='crc32c',
+                if_generation_match=0
             )
             
             return f"gs://{bucket_name}/{full_blob_path}"
@@ -1207,6 +1738,93 @@ class DocumentAIProcessor:
             st.error(f"Error saving JSON to GCS: {str(e)}")
             raise
 
+    def _build_json_payload(self, data: Dict[str, Any]) -> bytes:
+        """Serialize document processing results to compact UTF-8 encoded JSON"""
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def _upload_many(self, bucket_name: str, items: List[Tuple[str, Union[bytes, io.BytesIO], str]], max_workers: int = 8) -> List[str]:
+        """
+        Upload several in-memory objects to one bucket concurrently
+        
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            items (List[Tuple[str, Union[bytes, io.BytesIO], str]]): (blob path, data, content type) per object
+            max_workers (int, optional): Maximum number of parallel uploads
+        
+        Returns:
+            List[str]: GCS URIs of the uploaded objects, in input order
+        """
+        bucket_name = bucket_name.replace('gs://', '')
+        bucket = self._get_bucket(bucket_name)
+        
+        uploads = []
+        for blob_path, payload, content_type in items:
+            blob = bucket.blob(blob_path)
+            blob.content_type = content_type
+            source = io.BytesIO(payload) if isinstance(payload, (bytes, bytearray)) else payload
+            uploads.append((source, blob))
+        
+        transfer_manager.upload_many(
+            uploads,
+            upload_kwargs={'checksum': 'crc32c', 'if_generation_match': 0},
+            raise_exception=True,
+            worker_type=transfer_manager.THREAD,
+            max_workers=min(max_workers, max(len(uploads), 1))
+        )
+        
+        return [f"gs://{bucket_name}/{blob_path}" for blob_path, _, _ in items]
+
+    def save_results_to_gcs(self, bucket_name: str, data: Dict[str, Any], filename: str, prefix: str = '') -> Tuple[str, str]:
+        """
+        Save the document processing results as JSON and Excel in one batched upload
+        
+        The JSON payload is serialized on a worker thread while the Excel workbook
+        is built, then both blobs are uploaded concurrently with the transfer manager.
+        
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            data (Dict[str, Any]): Document processing results
+            filename (str): Base name of the output files (without extension)
+            prefix (str, optional): Folder prefix in the bucket
+            
+        Returns:
+            Tuple[str, str]: GCS URIs of the saved JSON and Excel files
+        """
+        try:
+            # Serialize JSON in the background while the Excel workbook is built
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                json_future = executor.submit(self._build_json_payload, data)
+                excel_buffer = self._write_excel_workbook(data)
+                json_payload = json_future.result()
+            
+            # Prepare the blob paths
+            bucket_name, json_blob_path = _resolve_blob_path(bucket_name, filename, prefix)
+            excel_blob_path = f"{json_blob_path}.xlsx"
+            
+            # Upload both files concurrently over the shared client session
+            json_gcs_uri, excel_gcs_uri = self._upload_many(bucket_name, [
+                (json_blob_path, json_payload, 'application/json'),
+                (excel_blob_path, excel_buffer, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            ])
+            
+            return json_gcs_uri, excel_gcs_uri
+            
+        except Exception as e:
+            st.error(f"Error saving results to GCS: {str(e)}")
+            raise
+
+# Storage client shared by module-level GCS helpers, created on first use
+_STORAGE_CLIENT = None
+
+def _get_storage_client() -> storage.Client:
+    """Return the shared storage client, creating it on first use"""
+    global _STORAGE_CLIENT
+    if _STORAGE_CLIENT is None:
+        _STORAGE_CLIENT = storage.Client()
+    return _STORAGE_CLIENT
+
 def download_file_from_gcs(bucket_name: str, source_blob_name: str) -> bytes:
     """
     Download a file from Google Cloud Storage
@@ -1221,15 +1839,32 @@ def download_file_from_gcs(bucket_name: str, source_blob_name: str) -> bytes:
     # Remove 'gs://' if present
     bucket_name = bucket_name.replace('gs://', '')
     
-    # Create storage client
-    storage_client = storage.Client()
-    
-    # Get the bucket and blob
-    bucket = storage_client.bucket(bucket_name)
+    # Get the bucket and blob through the shared storage client
+    bucket = _get_storage_client().bucket(bucket_name)
     blob = bucket.blob(source_blob_name)
     
-    # Download the file
-    return blob.download_as_bytes()
+    # Stream the object into memory as stored, skipping decompressive transcoding;
+    # the CRC32C check stays on and uses the google-crc32c C extension
+    buffer = io.BytesIO()
+    blob.download_to_file(buffer, raw_download=True)
+    return buffer.getvalue()
+
+@st.cache_resource
+def get_document_processor(project_id: str, location: str) -> DocumentAIProcessor:
+    """
+    Return a DocumentAIProcessor shared across Streamlit reruns and sessions
+    
+    Streamlit reruns the whole script on every interaction; caching the processor
+    keeps its Document AI and storage clients (and their connections) alive.
+    
+    Args:
+        project_id (str): Google Cloud project ID
+        location (str): Document AI processor location
+    
+    Returns:
+        DocumentAIProcessor: Cached processor instance
+    """
+    return DocumentAIProcessor(project_id=project_id, location=location)
 
 def main():
     # st.write(f"Debug: Current Page - {st.session_state.get('page', 'Unknown')}")  # Debugging
@@ -1275,7 +1910,7 @@ def main():
                 st.session_state.processing_complete = False
                 
                 # Initialize processor
-                processor = DocumentAIProcessor(
+                processor = get_document_processor(
                     project_id=PROJECT_CONFIG['project_id'],
                     location=PROJECT_CONFIG['location']
                 )
@@ -1289,39 +1924,33 @@ def main():
                 output_filename = f"{base_name}_{timestamp}"
                 
                 # Create a temporary file for the uploaded PDF
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                    temp_file.write(uploaded_file.getvalue())
+                # Stream the upload in 1 MiB chunks instead of copying it into a new bytes object
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf', buffering=1 << 20) as temp_file:
+                    uploaded_file.seek(0)
+                    shutil.copyfileobj(uploaded_file, temp_file, length=1 << 20)
                     input_filename = temp_file.name
                 
                 # Process document
                 print(f'path : {input_filename}')
-                st.session_state.document_result = processor.process_document_page_by_page(
+                st.session_state.document_result = processor.process_document(
                     input_file_path=input_filename,
-                    processor_id=PROJECT_CONFIG['processor_id']
+                    processor_id=PROJECT_CONFIG['processor_id'],
+                    bucket_name=PROJECT_CONFIG['input_bucket']
                 )
                 
-                # Save JSON to GCS first
-                processor.save_to_gcs_as_json(
+                # Save JSON and Excel to GCS in a single batched upload
+                _, excel_gcs_uri = processor.save_results_to_gcs(
                     bucket_name=PROJECT_CONFIG['output_bucket'],
                     data=st.session_state.document_result,
                     filename=output_filename,
                     prefix="prod-output"
                 )
                 
-                # Then save Excel
-                excel_gcs_uri = processor.save_excel_to_gcs(
-                    bucket_name=PROJECT_CONFIG['output_bucket'],
-                    data=st.session_state.document_result,
-                    filename=f"{output_filename}.xlsx",
-                    prefix="prod-output"
-                )
-                
                 st.session_state.excel_output_filename = f"prod-output/{output_filename}.xlsx"  # Updated path
                 st.session_state.excel_gcs_uri = excel_gcs_uri
                 st.session_state.processing_complete = True
                 
                 st.success("Document processed successfully!")
-                processor.display_document_results(st.session_state.document_result)
                 
             except Exception as e:
                 st.error(f"Error processing document: {str(e)}")
@@ -1335,30 +1964,42 @@ def main():
     
     # Only show results once
     if st.session_state.document_result is not None:
-        processor = DocumentAIProcessor(
-            project_id=PROJECT_CONFIG['project_id'],
-            location=PROJECT_CONFIG['location']
-        )
-        # Remove the duplicate header
-        st.markdown("## Document Analysis Results")
-        processor.display_document_results(st.session_state.document_result)
+        results_view(st.session_state.document_result)
     
     # Add Excel download button if processing is complete
     if st.session_state.processing_complete:
-        try:
-            excel_bytes = download_file_from_gcs(
-                bucket_name=st.session_state.output_bucket,
-                source_blob_name=st.session_state.excel_output_filename
-            )
-            
-            st.download_button(
-                label="📥 Download Excel Report",
-                data=excel_bytes,
-                file_name=os.path.basename(st.session_state.excel_output_filename),
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        except Exception as e:
-            st.error(f"Error preparing download: {str(e)}")
+        download_view()
+
+
+@st.fragment
+def results_view(document_result: Dict[str, Any]):
+    """Render the analysis results; reruns independently of the rest of the page"""
+    processor = get_document_processor(
+        project_id=PROJECT_CONFIG['project_id'],
+        location=PROJECT_CONFIG['location']
+    )
+    # Remove the duplicate header
+    st.markdown("## Document Analysis Results")
+    processor.display_document_results(document_result)
+
+
+@st.fragment
+def download_view():
+    """Render the Excel download button; clicking it only reruns this fragment"""
+    try:
+        excel_bytes = download_file_from_gcs(
+            bucket_name=st.session_state.output_bucket,
+            source_blob_name=st.session_state.excel_output_filename
+        )
+        
+        st.download_button(
+            label="📥 Download Excel Report",
+            data=excel_bytes,
+            file_name=os.path.basename(st.session_state.excel_output_filename),
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    except Exception as e:
+        st.error(f"Error preparing download: {str(e)}")
 
 
 CLIENT_SECRETS_FILE = "client_secret_doc_ai_extraction.json"